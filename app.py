@@ -1,5 +1,7 @@
 from flask import Flask
-from mongoengine import connect
+from db import connect_db
+from utils.metrics import init_metrics
+from models.indexes import ensure_indexes_on_startup
 from dotenv import load_dotenv
 import os
 from flask_jwt_extended import JWTManager
@@ -7,10 +9,14 @@ from flask_cors import CORS
 from datetime import timedelta
 load_dotenv()
 
-def create_app():
+def create_app(connect=True):
+    """connect=False leaves the Mongo connection to the caller, e.g. the
+    pre-fork server connects each worker after fork (gunicorn.conf.py)"""
     app = Flask(__name__)
     app.config["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET_KEY")
     app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(hours=24)
+    # signs /client device sessions, see utils/client_session.py
+    app.config["CLIENT_SESSION_SECRET"] = os.getenv("CLIENT_SESSION_SECRET") or app.config["JWT_SECRET_KEY"]
 
     CORS(app)
 
@@ -18,12 +24,12 @@ def create_app():
     # CORS(app)
 
 
-    import certifi
+    # before connect_db(): pymongo attaches listeners when the client is created
+    init_metrics(app)
 
-    connect(
-        host=os.getenv("MONGO_URI"),
-        tlsCAFile=certifi.where()
-    )
+    if connect:
+        connect_db()
+        ensure_indexes_on_startup()
 
 
     from routes.admin_user import admin_bp
@@ -35,6 +41,8 @@ def create_app():
     from routes.invite import invite_bp
     from routes.client  import client_bp
     from routes.category_invite_routes import category_invite_bp
+    from routes.health import health_bp
+    app.register_blueprint(health_bp)
     app.register_blueprint(client_bp)
     app.register_blueprint(invite_bp)
     app.register_blueprint(category_invite_bp)
@@ -48,10 +56,9 @@ def create_app():
     return app
 
 
-app = create_app()
-
-import os
+# Development server only; production runs wsgi:app under gunicorn (Procfile)
 if __name__ == "__main__":
+    app = create_app()
     for rule in app.url_map.iter_rules():
         print(rule, rule.methods)
     app.run(
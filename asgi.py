@@ -0,0 +1,51 @@
+"""
+ASGI entry point for the async public catalog (routes/client_async.py):
+
+    uvicorn asgi:app --workers 4
+
+The /client/* read endpoints are served on the event loop. With
+ASGI_MOUNT_FLASK=1 the rest of the Flask app is mounted behind them, so
+one service answers every route; otherwise run this next to the gunicorn
+web process and send /client/* reads here.
+"""
+import contextlib
+import os
+
+from dotenv import load_dotenv
+
+# before the imports below, they read settings at import time
+load_dotenv()
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.routing import Mount
+
+from db import close_async_db, get_async_db
+from routes.client_async import routes
+
+MOUNT_FLASK = os.getenv("ASGI_MOUNT_FLASK") == "1"
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # one AsyncMongoClient per worker, opened on its own event loop
+    get_async_db()
+    yield
+    await close_async_db()
+
+
+if MOUNT_FLASK:
+    from a2wsgi import WSGIMiddleware
+
+    from app import create_app
+
+    # admin and invite routes stay sync, on a2wsgi's thread pool
+    routes = routes + [Mount("/", app=WSGIMiddleware(create_app()))]
+
+app = Starlette(
+    routes=routes,
+    lifespan=lifespan,
+    # same wide-open policy as CORS(app) in create_app()
+    middleware=[Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])],
+)
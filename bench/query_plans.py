@@ -0,0 +1,164 @@
+"""
+Fail when a route's query plan is a collection scan.
+
+    python -m bench.seed --scale 10k
+    python -m bench.query_plans            # exit 1 on any COLLSCAN
+
+Drives the read routes (and invite verification) through the Flask test
+client against the seeded bench database, captures every find /
+aggregate / count / distinct / findAndModify they send with a pymongo
+CommandListener, and runs each one through `explain`. A winning plan
+with a COLLSCAN stage fails the check unless the request is marked as
+an expected scan below or its collection is listed in --allow
+(admin_user is small by design and listed by default).
+
+Needs a real mongod: mongomock has no explain.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+
+from pymongo import monitoring
+
+EXPLAINABLE = {"find", "aggregate", "count", "distinct", "findAndModify"}
+
+# driver bookkeeping that explain rejects or doesn't need
+_DRIVER_KEYS = {"lsid", "$db", "$clusterTime", "$readPreference", "txnNumber", "apiVersion"}
+
+
+class CommandCapture(monitoring.CommandListener):
+    def __init__(self):
+        self.route = None
+        self.commands = []
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        if event.command_name in EXPLAINABLE and self.route:
+            command = {k: v for k, v in event.command.items() if k not in _DRIVER_KEYS}
+            with self._lock:
+                self.commands.append((self.route, event.command_name, command))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def collscans(explain):
+    """Every COLLSCAN stage in the explain output's winning plans"""
+    found = []
+
+    def walk(node, in_winning_plan=False):
+        if isinstance(node, dict):
+            if in_winning_plan and node.get("stage") == "COLLSCAN":
+                found.append(node)
+            for key, value in node.items():
+                walk(value, in_winning_plan or key in ("winningPlan", "queryPlan"))
+        elif isinstance(node, list):
+            for value in node:
+                walk(value, in_winning_plan)
+
+    walk(explain)
+    return found
+
+
+def requests_to_check(catalog):
+    """(method, path, json body, reason a collection scan is expected or None)"""
+    category_id = catalog["category_ids"][0]
+    token = catalog["category_tokens"][0]
+    variety = catalog["varieties"][0]
+    return [
+        ("GET", "/client/sarees?page=1", None, None),
+        ("GET", "/client/sarees?page=3&min_price=1000&max_price=20000", None, None),
+        ("GET", f"/client/sarees?varieties={variety}&page=1", None, None),
+        ("GET", "/client/sarees?cursor=&include_total=1", None, None),
+        ("GET", f"/client/sarees?token={token}&page=1", None, None),
+        ("GET", f"/client/catalog?varieties={variety}", None, None),
+        ("GET", "/client/varieties", None, None),
+        ("GET", f"/client/varieties?token={token}", None, None),
+        ("POST", "/api/invite/category/verify", {"token": token, "device_id": "query-plans"}, None),
+        ("GET", "/admin/categories?sort_by=total_saree_count&order=desc", None, None),
+        ("GET", "/admin/categories?search=collection", None, None),
+        ("GET", f"/admin/category/{category_id}", None, None),
+        ("GET", f"/admin/category/{category_id}/sarees/picker", None, None),
+        ("GET", f"/admin/category/{category_id}/sarees/picker?page=50", None, None),
+        ("GET", f"/admin/category/{category_id}/sarees/picker?search=saree1&variety={variety}", None, None),
+        ("GET", "/sarees?page=2", None, None),
+        ("GET", f"/sarees?variety={variety}", None, None),
+        ("GET", "/sarees?search=saree12", None, None),
+        ("GET", f"/sarees?search={variety}&search_mode=text", None, None),
+        ("GET", "/admin/varieties?sort_by=total_saree_count&order=desc", None, None),
+        ("GET", f"/admin/varieties?search={variety[:3]}", None, None),
+        ("GET", "/admin/dashboard/stats", None, None),
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", help="bench database, default BENCH_MONGO_URI")
+    parser.add_argument("--allow", default="admin_user", help="comma-separated collections allowed to COLLSCAN")
+    parser.add_argument("--verbose", action="store_true", help="print every explained command")
+    args = parser.parse_args(argv)
+
+    # the response cache would hide repeated queries; tokens only need to agree with this app
+    os.environ["CATALOG_CACHE_ENABLED"] = "false"
+    os.environ.setdefault("JWT_SECRET_KEY", "bench-only-secret-key-of-32-bytes!")
+
+    # listeners attach to clients created after registration
+    capture = CommandCapture()
+    monitoring.register(capture)
+
+    from flask_jwt_extended import create_access_token
+    from mongoengine.connection import get_db
+
+    from app import create_app
+    from bench.seed import BENCH_MONGO_URI, connect_bench, describe
+    from models.admin_user import AdminUser
+    from models.indexes import ensure_indexes
+    from utils.admin_identity import admin_claims
+
+    connect_bench(args.uri or BENCH_MONGO_URI)
+    ensure_indexes()
+    catalog = describe()
+
+    app = create_app(connect=False)
+    with app.app_context():
+        admin = AdminUser.objects.get(id=catalog["admin_id"])
+        jwt = create_access_token(identity=str(admin.id), additional_claims=admin_claims(admin))
+    headers = {"Authorization": f"Bearer {jwt}"}
+    client = app.test_client()
+
+    expected_scans = {}
+    for method, path, body, scan_reason in requests_to_check(catalog):
+        capture.route = f"{method} {path}"
+        expected_scans[capture.route] = scan_reason
+        response = client.open(path, method=method, json=body, headers=headers)
+        if response.status_code >= 400:
+            print(f"warning: {capture.route} answered {response.status_code}", file=sys.stderr)
+    capture.route = None
+
+    db = get_db()
+    allowed = set(filter(None, args.allow.split(",")))
+    failures = 0
+    for route, name, command in capture.commands:
+        collection = command.get(name)
+        explain = db.command({"explain": command, "verbosity": "queryPlanner"})
+        scans = collscans(explain)
+        if args.verbose or scans:
+            status = "COLLSCAN" if scans else "ok"
+            print(f"{status:<9} {route}  {name} {collection}")
+        if scans and (collection in allowed or expected_scans[route]):
+            print(f"  expected: {expected_scans[route] or 'allowed collection'}")
+        elif scans:
+            failures += 1
+            print("  " + json.dumps({k: v for k, v in command.items() if k != "pipeline"}, default=str)[:400])
+
+    print(f"{len(capture.commands)} commands explained, {failures} collection scan(s)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
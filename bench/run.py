@@ -0,0 +1,270 @@
+"""
+Route benchmarks against a seeded catalog.
+
+    python -m bench.seed --scale 100k
+    python -m bench.run --concurrency 16 --requests 500 --out bench/results/100k.json
+    python -m bench.run --compare bench/results/100k.json        # after a change
+
+    python -m bench.run --seed --scale 10k                        # seed, then run
+    python -m bench.run --seed --scale 10k --mongomock            # smoke run, no mongod
+    python -m bench.run --url http://localhost:8000               # a running server
+
+Requests go through the Flask test client by default (the app runs in
+this process against BENCH_MONGO_URI) or over HTTP with --url, in which
+case the server must point at the same seeded database and share
+JWT_SECRET_KEY. Admin routes get a JWT minted for the seeded bench admin.
+
+The catalog response cache is off unless --cache is given, so the
+numbers measure the queries rather than cache hits. mongomock is slow
+and lacks some aggregation operators; use it to check the harness, not
+to measure.
+
+Output is JSON: per scenario requests, errors, p50/p95/p99/mean in ms and
+throughput in requests per second. --compare prints the change against
+a previous result file and exits 1 when a p99 regressed by more than
+--fail-threshold.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+
+def _percentile(ordered, q):
+    if not ordered:
+        return 0.0
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def scenarios(catalog, rng):
+    """name -> (admin route?, callable returning a path)"""
+    varieties = catalog["varieties"]
+    category_ids = catalog["category_ids"]
+    tokens = catalog["category_tokens"] or [""]
+    pages = max(catalog["sarees"] // 12, 1)
+
+    return {
+        "client_sarees_page1": (False, lambda: "/client/sarees?page=1&per_page=12"),
+        "client_sarees_deep_page": (False, lambda: f"/client/sarees?page={rng.randint(1, min(pages, 200))}&per_page=12"),
+        "client_sarees_cursor": (False, lambda: "/client/sarees?cursor=&per_page=12&include_total=1"),
+        "client_sarees_filtered": (False, lambda: (
+            f"/client/sarees?varieties={rng.choice(varieties)},{rng.choice(varieties)}"
+            f"&min_price={rng.randrange(500, 20000, 500)}&page=1&per_page=12"
+        )),
+        "client_sarees_token": (False, lambda: f"/client/sarees?token={rng.choice(tokens)}&page=1&per_page=12"),
+        "client_catalog": (False, lambda: f"/client/catalog?varieties={rng.choice(varieties)}&page=1&per_page=12"),
+        "client_varieties": (False, lambda: "/client/varieties"),
+        "client_varieties_token": (False, lambda: f"/client/varieties?token={rng.choice(tokens)}"),
+        "admin_categories": (True, lambda: (
+            f"/admin/categories?sort_by=total_saree_count&order=desc&page={rng.randint(1, 5)}"
+        )),
+        "admin_categories_search": (True, lambda: f"/admin/categories?search=collection%20{rng.randint(0, 9)}"),
+        "category_picker": (True, lambda: f"/admin/category/{rng.choice(category_ids)}/sarees/picker?page=1"),
+        "category_picker_deep_page": (True, lambda: (
+            f"/admin/category/{rng.choice(category_ids)}/sarees/picker?page={rng.randint(2, 50)}"
+        )),
+        "category_picker_search": (True, lambda: (
+            f"/admin/category/{rng.choice(category_ids)}/sarees/picker?search=saree{rng.randint(1, 99)}"
+        )),
+        "admin_dashboard_stats": (True, lambda: "/admin/dashboard/stats"),
+    }
+
+
+class TestClientDriver:
+    """One Flask test client per worker thread"""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def get(self, path, headers):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.get(path, headers=headers)
+        return response.status_code, len(response.get_data())
+
+
+class HttpDriver:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def get(self, path, headers):
+        request = urllib.request.Request(self.base_url + path, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                return response.status, len(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, len(e.read())
+
+
+def run_scenario(driver, make_path, headers, requests, concurrency, warmup):
+    for _ in range(warmup):
+        driver.get(make_path(), headers)
+
+    def one(_):
+        path = make_path()
+        started = time.perf_counter()
+        status, size = driver.get(path, headers)
+        return time.perf_counter() - started, status, size
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - started
+
+    latencies = sorted(r[0] * 1000 for r in results)
+    errors = [r[1] for r in results if r[1] >= 400]
+    return {
+        "requests": requests,
+        "errors": len(errors),
+        "error_statuses": sorted(set(errors)),
+        "p50_ms": round(_percentile(latencies, 0.5), 3),
+        "p95_ms": round(_percentile(latencies, 0.95), 3),
+        "p99_ms": round(_percentile(latencies, 0.99), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "throughput_rps": round(requests / wall, 1),
+        "mean_bytes": round(sum(r[2] for r in results) / len(results)),
+    }
+
+
+def compare(current, previous, threshold):
+    """Print p50/p99/throughput changes; True when any p99 regressed past threshold"""
+    regressed = False
+    print(f"{'scenario':<28}{'p50 ms':>18}{'p99 ms':>22}{'rps':>20}", file=sys.stderr)
+    for name, now in current["routes"].items():
+        before = previous["routes"].get(name)
+        if not before:
+            print(f"{name:<28}{'(new)':>18}", file=sys.stderr)
+            continue
+
+        def change(key):
+            old, new = before[key], now[key]
+            pct = (new - old) / old * 100 if old else 0.0
+            return f"{old:.1f}->{new:.1f} ({pct:+.0f}%)", pct
+
+        p50, _ = change("p50_ms")
+        p99, p99_pct = change("p99_ms")
+        rps, _ = change("throughput_rps")
+        flag = ""
+        if p99_pct > threshold * 100:
+            regressed = True
+            flag = "  REGRESSED"
+        print(f"{name:<28}{p50:>18}{p99:>22}{rps:>20}{flag}", file=sys.stderr)
+    return regressed
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", action="store_true", help="seed the bench database first")
+    parser.add_argument("--scale", default="10k", help="with --seed: 10k, 100k, 1m or a saree count")
+    parser.add_argument("--mongomock", action="store_true", help="in-memory Mongo (implies --seed)")
+    parser.add_argument("--uri", help="bench database, default BENCH_MONGO_URI")
+    parser.add_argument("--url", help="benchmark a running server over HTTP instead of the test client")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="per scenario")
+    parser.add_argument("--warmup", type=int, default=10, help="unmeasured requests per scenario")
+    parser.add_argument("--only", help="comma-separated scenario names")
+    parser.add_argument("--cache", action="store_true", help="leave the catalog response cache on")
+    parser.add_argument("--out", help="write results JSON here (stdout otherwise)")
+    parser.add_argument("--compare", help="previous results JSON to compare against")
+    parser.add_argument("--fail-threshold", type=float, default=0.2, help="p99 regression ratio that fails --compare")
+    parser.add_argument("--rng-seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    if args.mongomock and args.url:
+        parser.error("--mongomock only works with the in-process test client")
+
+    # read at import time by utils.catalog_cache, so set before importing the app
+    if not args.cache:
+        os.environ["CATALOG_CACHE_ENABLED"] = "false"
+    if not args.url:
+        # in-process, tokens only have to agree with this app
+        os.environ.setdefault("JWT_SECRET_KEY", "bench-only-secret-key-of-32-bytes!")
+
+    from flask_jwt_extended import create_access_token
+
+    from app import create_app
+    from bench.seed import BENCH_MONGO_URI, check_target, connect_bench, describe, parse_scale, seed
+    from models.admin_user import AdminUser
+    from utils.admin_identity import admin_claims
+
+    uri = args.uri or BENCH_MONGO_URI
+    if args.seed and not args.mongomock:
+        check_target(uri, force=False)
+    connect_bench(uri, use_mongomock=args.mongomock)
+    if args.seed or args.mongomock:
+        catalog = seed(parse_scale(args.scale), args.rng_seed, log=lambda msg: print(msg, file=sys.stderr))
+    else:
+        catalog = describe()
+
+    app = create_app(connect=False)
+    with app.app_context():
+        admin = AdminUser.objects.get(id=catalog["admin_id"])
+        jwt = create_access_token(identity=str(admin.id), additional_claims=admin_claims(admin))
+    admin_headers = {"Authorization": f"Bearer {jwt}"}
+
+    driver = HttpDriver(args.url) if args.url else TestClientDriver(app)
+    rng = random.Random(args.rng_seed)
+    selected = set(args.only.split(",")) if args.only else None
+
+    routes = {}
+    for name, (is_admin, make_path) in scenarios(catalog, rng).items():
+        if selected and name not in selected:
+            continue
+        print(f"running {name}", file=sys.stderr)
+        routes[name] = run_scenario(
+            driver, make_path, admin_headers if is_admin else {},
+            args.requests, args.concurrency, args.warmup
+        )
+
+    result = {
+        "meta": {
+            "revision": _git_revision(),
+            "at": datetime.now(timezone.utc).isoformat(),
+            "sarees": catalog["sarees"],
+            "mode": "http" if args.url else ("mongomock" if args.mongomock else "test_client"),
+            "concurrency": args.concurrency,
+            "requests_per_scenario": args.requests,
+            "response_cache": args.cache,
+        },
+        "routes": routes,
+    }
+
+    text = json.dumps(result, indent=2)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        if previous["meta"]["sarees"] != catalog["sarees"]:
+            print(f"note: comparing {catalog['sarees']} sarees against {previous['meta']['sarees']}", file=sys.stderr)
+        if compare(result, previous, args.fail_threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
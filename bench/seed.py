@@ -0,0 +1,233 @@
+"""
+Synthetic catalog for the benchmark suite.
+
+    python -m bench.seed --scale 100k
+
+Seeds BENCH_MONGO_URI (default mongodb://localhost:27017/saree_bench)
+with sarees, varieties, categories, invite tokens and a bench admin.
+Everything but the ObjectIds is derived from --seed, so two runs at the
+same scale produce the same catalog. Image keys and per-saree image counts are sampled from
+saree_image_urls.csv.
+
+The target collections are dropped first; the database name must
+contain "bench" unless --force is given. `python -m bench.run --seed`
+seeds and measures in one go (and is the only way to use mongomock).
+"""
+import argparse
+import csv
+import os
+import random
+import time
+from collections import Counter as Tally
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from mongoengine import connect, disconnect
+
+from models.admin_user import AdminUser
+from models.category import Category
+from models.dashboard_stats import DashboardStats
+from models.invite_token import CategoryInviteToken, InviteToken
+from models.saree import Counter, Saree, normalize_image_key
+from models.variety import Variety
+from utils.search import search_tokens
+
+BENCH_MONGO_URI = os.getenv("BENCH_MONGO_URI", "mongodb://localhost:27017/saree_bench")
+BENCH_ADMIN = "bench-admin"
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+VARIETY_NAMES = [
+    "Kanjivaram", "Banarasi", "Silk", "Cotton", "Chanderi", "Tussar",
+    "Georgette", "Chiffon", "Linen", "Organza", "Paithani", "Pochampally",
+    "Sambalpuri", "Bandhani", "Kota", "Maheshwari", "Baluchari", "Jamdani",
+    "Gadwal", "Uppada", "Mangalagiri", "Narayanpet", "Venkatagiri", "Ilkal",
+]
+
+REMARKS = [
+    "Zari border", "Temple border", "Handloom", "Contrast pallu",
+    "Light weight", "Bridal", "Festive wear", "Office wear", None, None, None,
+]
+
+DOCUMENTS = [Saree, Variety, Category, InviteToken, CategoryInviteToken, Counter, AdminUser, DashboardStats]
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "saree_image_urls.csv")
+
+
+def parse_scale(value):
+    value = value.lower()
+    if value in SCALES:
+        return SCALES[value]
+    return int(value.replace("_", ""))
+
+
+def connect_bench(uri=BENCH_MONGO_URI, use_mongomock=False):
+    disconnect()
+    if use_mongomock:
+        import mongomock
+        return connect(host=uri, mongo_client_class=mongomock.MongoClient)
+    return connect(host=uri)
+
+
+def image_samples():
+    """(storage keys, images-per-saree counts) from the real export"""
+    per_saree = Tally()
+    keys = []
+    with open(CSV_PATH, newline="") as f:
+        for row in csv.DictReader(f):
+            per_saree[row["saree_id"]] += 1
+            keys.append(normalize_image_key(row["image_url"]))
+    return keys, list(per_saree.values())
+
+
+def _insert(collection, docs, batch_size):
+    for start in range(0, len(docs), batch_size):
+        collection.insert_many(docs[start:start + batch_size], ordered=False)
+
+
+def seed(saree_count, rng_seed=42, batch_size=5000, log=print):
+    """Replace the bench collections with a synthetic catalog of
+    `saree_count` sarees; returns a summary the runner uses to build URLs"""
+    rng = random.Random(rng_seed)
+    started = time.perf_counter()
+
+    for document_cls in DOCUMENTS:
+        document_cls.drop_collection()
+
+    image_keys, image_counts = image_samples()
+    varieties = VARIETY_NAMES
+    # a few varieties carry most of the catalog, like the real one
+    variety_weights = [1 / (i + 1) for i in range(len(varieties))]
+    category_count = max(10, saree_count // 2000)
+    category_ids = [ObjectId() for _ in range(category_count)]
+    members = {cid: [] for cid in category_ids}
+    totals, published = Tally(), Tally()
+
+    now = datetime.now(timezone.utc)
+    sarees = []
+    for n in range(1, saree_count + 1):
+        saree_id = ObjectId()
+        name = f"Saree{n:03d}"
+        variety = rng.choices(varieties, variety_weights)[0]
+        remarks = rng.choice(REMARKS)
+        min_price = float(rng.randrange(500, 50000, 50))
+        status = "published" if rng.random() < 0.9 else "unpublished"
+
+        # half the catalog sits in no category, a few sarees in two
+        roll = rng.random()
+        in_categories = rng.sample(category_ids, 2 if roll < 0.15 else 1) if roll < 0.5 else []
+        for cid in in_categories:
+            members[cid].append(saree_id)
+
+        totals[variety] += 1
+        if status == "published":
+            published[variety] += 1
+
+        sarees.append({
+            "_id": saree_id,
+            "name": name,
+            "image_urls": rng.sample(image_keys, min(rng.choice(image_counts), len(image_keys))),
+            "variety": variety,
+            "remarks": remarks,
+            "min_price": min_price,
+            "max_price": min_price + rng.randrange(0, 10000, 50),
+            "last_edited_at": now - timedelta(seconds=(saree_count - n) * 37 + rng.randrange(30)),
+            "status": status,
+            "categories": in_categories,
+            "search_tokens": search_tokens(name, variety, remarks),
+        })
+        if len(sarees) == batch_size:
+            _insert(Saree._get_collection(), sarees, batch_size)
+            sarees = []
+            log(f"  sarees {n}/{saree_count}")
+    _insert(Saree._get_collection(), sarees, batch_size)
+
+    _insert(Variety._get_collection(), [
+        {
+            "name": name,
+            "total_saree_count": totals[name],
+            "published_saree_count": published[name],
+            "search_tokens": search_tokens(name),
+        }
+        for name in varieties
+    ], batch_size)
+
+    _insert(Category._get_collection(), [
+        {
+            "_id": cid,
+            "name": f"Collection {i + 1:03d}",
+            "sarees": members[cid],
+            "saree_count": len(members[cid]),
+            "admin": {"username": BENCH_ADMIN, "full_name": "Bench Admin", "last_edited_date": now},
+        }
+        for i, cid in enumerate(category_ids)
+    ], batch_size)
+
+    # one link per category, every tenth link spans three; 5% disabled
+    invites = []
+    tokens = []
+    for i, cid in enumerate(category_ids):
+        token = f"bench-cat-{i:05d}"
+        scope = [cid] + (rng.sample(category_ids, 2) if i % 10 == 0 else [])
+        active = rng.random() >= 0.05
+        invites += [
+            {"token": token, "category": c, "is_active": active, "created_at": now}
+            for c in dict.fromkeys(scope)
+        ]
+        if active:
+            tokens.append(token)
+    _insert(CategoryInviteToken._get_collection(), invites, batch_size)
+    _insert(InviteToken._get_collection(), [
+        {"token": f"bench-invite-{i:05d}", "is_active": True, "locked_device_id": None, "created_at": now}
+        for i in range(100)
+    ], batch_size)
+
+    Counter._get_collection().insert_many([
+        {"name": "saree", "seq": saree_count},
+        {"name": "catalog_version", "seq": 1},
+    ])
+    admin = AdminUser(username=BENCH_ADMIN, full_name="Bench Admin", password="bench").save()
+
+    # every declared index, as a deployed database has them
+    for document_cls in DOCUMENTS:
+        document_cls.ensure_indexes()
+
+    log(f"seeded {saree_count} sarees in {time.perf_counter() - started:.1f}s")
+    return {
+        "sarees": saree_count,
+        "varieties": varieties,
+        "category_ids": [str(c) for c in category_ids],
+        "category_tokens": tokens,
+        "admin_id": str(admin.id),
+    }
+
+
+def describe():
+    """The summary seed() returns, rebuilt from an already seeded database"""
+    return {
+        "sarees": Saree._get_collection().estimated_document_count(),
+        "varieties": Variety._get_collection().distinct("name"),
+        "category_ids": [str(c) for c in Category._get_collection().distinct("_id")],
+        "category_tokens": sorted(CategoryInviteToken._get_collection().distinct("token", {"is_active": True})),
+        "admin_id": str(AdminUser.objects.get(username=BENCH_ADMIN).id),
+    }
+
+
+def check_target(uri, force):
+    db_name = uri.rsplit("/", 1)[-1].split("?", 1)[0]
+    if "bench" not in db_name and not force:
+        raise SystemExit(f"refusing to drop collections in {db_name!r}; use a *bench* database or --force")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", default="10k", help="10k, 100k, 1m or a saree count")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--uri", default=BENCH_MONGO_URI)
+    parser.add_argument("--force", action="store_true")
+    args = parser.parse_args()
+
+    check_target(args.uri, args.force)
+    connect_bench(args.uri)
+    seed(parse_scale(args.scale), args.seed, args.batch_size)
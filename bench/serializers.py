@@ -0,0 +1,101 @@
+"""
+Document vs raw-document serialization of list pages.
+
+    python -m bench.serializers --page-size 100 --pages 200
+
+Builds synthetic saree documents shaped like bench.seed's and times the
+per-page CPU cost of the two list paths:
+
+- document: full stored document -> Saree._from_son() -> to_json()
+  (what the list endpoints did before they projected)
+- raw: SAREE_JSON_PROJECTION fields -> saree_doc_to_json()
+
+Every page is also checked for identical output. No database needed;
+for end-to-end numbers run bench.run against a seeded mongod.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+
+from bench.seed import REMARKS, VARIETY_NAMES, image_samples
+from models.saree import SAREE_JSON_FIELDS, Saree, saree_doc_to_json
+from utils.search import search_tokens
+
+
+def synthetic_page(rng, size, image_keys, categories):
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    page = []
+    for n in range(size):
+        name = f"Saree{rng.randint(1, 999999):03d}"
+        variety = rng.choice(VARIETY_NAMES)
+        remarks = rng.choice(REMARKS)
+        min_price = float(rng.randrange(500, 50000, 50))
+        page.append({
+            "_id": ObjectId(),
+            "name": name,
+            "image_urls": rng.sample(image_keys, rng.randint(1, 6)),
+            "variety": variety,
+            "remarks": remarks,
+            "min_price": min_price,
+            "max_price": min_price + rng.randrange(0, 10000, 50),
+            "last_edited_at": now - timedelta(minutes=n),
+            "status": "published",
+            "categories": rng.sample(categories, rng.randint(0, 2)),
+            "search_tokens": search_tokens(name, variety, remarks),
+        })
+    return page
+
+
+def _time(fn, pages):
+    started = time.perf_counter()
+    for page in pages:
+        fn(page)
+    return (time.perf_counter() - started) / len(pages) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--rng-seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.rng_seed)
+    image_keys, _ = image_samples()
+    categories = [ObjectId() for _ in range(50)]
+    stored = [synthetic_page(rng, args.page_size, image_keys, categories) for _ in range(args.pages)]
+    projected = [
+        [{k: doc[k] for k in ("_id",) + SAREE_JSON_FIELDS} for doc in page]
+        for page in stored
+    ]
+
+    def document_path(page):
+        return [Saree._from_son(doc).to_json() for doc in page]
+
+    def raw_path(page):
+        return [saree_doc_to_json(doc) for doc in page]
+
+    for full, slim in zip(stored, projected):
+        if document_path(full) != raw_path(slim):
+            print("raw serializer output differs from to_json()", file=sys.stderr)
+            return 1
+
+    document_ms = _time(document_path, stored)
+    raw_ms = _time(raw_path, projected)
+    print(json.dumps({
+        "page_size": args.page_size,
+        "pages": args.pages,
+        "document_ms_per_page": round(document_ms, 3),
+        "raw_ms_per_page": round(raw_ms, 3),
+        "speedup": round(document_ms / raw_ms, 1),
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+import os
+
+import certifi
+from mongoengine import connect, disconnect
+from mongoengine.connection import DEFAULT_DATABASE_NAME, get_db
+from pymongo import AsyncMongoClient
+
+_async_client = None
+
+
+def _client_options():
+    return {
+        "host": os.getenv("MONGO_URI"),
+        "tlsCAFile": certifi.where(),
+        "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", 100)),
+        # fail fast (and report not-ready) instead of hanging a worker for 30s
+        "serverSelectionTimeoutMS": int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000)),
+    }
+
+
+def connect_db():
+    """Connect the default mongoengine alias.
+
+    Under the pre-fork server this runs in each worker after fork (see
+    gunicorn.conf.py), so no MongoClient is ever shared across processes.
+    """
+    return connect(**_client_options())
+
+
+def disconnect_db():
+    disconnect()
+
+
+def ping_db():
+    get_db().command("ping")
+
+
+def get_async_db():
+    """Database handle on the process-wide AsyncMongoClient used by the
+    async catalog (asgi.py). Created lazily so it binds to the running
+    event loop of the worker; same database mongoengine resolves from
+    MONGO_URI."""
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncMongoClient(**_client_options())
+    return _async_client.get_default_database(DEFAULT_DATABASE_NAME)
+
+
+async def close_async_db():
+    global _async_client
+    if _async_client is not None:
+        client, _async_client = _async_client, None
+        await client.close()
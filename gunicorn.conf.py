@@ -0,0 +1,43 @@
+"""
+gunicorn settings for the production server (see Procfile).
+
+    WEB_CONCURRENCY        worker processes (default: 2 x cores + 1)
+    GUNICORN_THREADS       threads per worker (default: 4)
+    GUNICORN_TIMEOUT       seconds before a stuck worker is killed (default: 30)
+    GUNICORN_GRACEFUL_TIMEOUT  seconds to finish in-flight requests on
+                           SIGTERM / restart (default: 25, under Heroku's 30s)
+"""
+import multiprocessing
+import os
+
+# wsgi.py must not connect in the master; workers connect in post_fork
+os.environ["DEFER_DB_CONNECT"] = "1"
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+worker_class = "gthread"
+preload_app = True
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 25))
+keepalive = 5
+
+# recycle workers now and then so in-process caches / leaks stay bounded
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 5000))
+max_requests_jitter = 500
+
+accesslog = "-"
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    from db import connect_db
+    from models.indexes import ensure_indexes_on_startup
+    connect_db()
+    ensure_indexes_on_startup()
+
+
+def worker_exit(server, worker):
+    from db import disconnect_db
+    disconnect_db()
@@ -0,0 +1,17 @@
+"""
+Populate Category.saree_count from the length of Category.sarees.
+
+    python -m migrations.backfill_category_saree_counts
+"""
+from dotenv import load_dotenv
+
+from db import connect_db
+from models.category import Category, recount_category_sarees
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    connect_db()
+    recount_category_sarees()
+    Category.ensure_indexes()
+    print("Category saree counts backfilled")
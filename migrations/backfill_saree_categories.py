@@ -0,0 +1,40 @@
+"""
+Backfill Saree.categories from Category.sarees.
+
+    python -m migrations.backfill_saree_categories
+"""
+from dotenv import load_dotenv
+from pymongo import UpdateMany
+
+from db import connect_db
+from models.category import Category
+from models.saree import Saree
+
+
+def run():
+    sarees = Saree._get_collection()
+    categories = Category._get_collection()
+
+    # rebuild from scratch so stale memberships are dropped too
+    sarees.update_many({}, {"$set": {"categories": []}})
+
+    ops = []
+    for category in categories.find({}, {"sarees": 1}):
+        saree_ids = category.get("sarees") or []
+        if saree_ids:
+            ops.append(UpdateMany(
+                {"_id": {"$in": saree_ids}},
+                {"$addToSet": {"categories": category["_id"]}}
+            ))
+
+    if ops:
+        sarees.bulk_write(ops, ordered=False)
+
+    Saree.ensure_indexes()
+    print(f"Backfilled membership for {len(ops)} categories")
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    connect_db()
+    run()
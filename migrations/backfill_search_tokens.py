@@ -0,0 +1,34 @@
+"""
+Populate search_tokens on existing sarees and varieties.
+
+    python -m migrations.backfill_search_tokens
+"""
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+
+from db import connect_db
+from models.saree import Saree, refresh_search_tokens
+from models.variety import Variety
+from utils.search import search_tokens
+
+
+def run():
+    refresh_search_tokens({})
+
+    varieties = Variety._get_collection()
+    ops = [
+        UpdateOne({"_id": doc["_id"]}, {"$set": {"search_tokens": search_tokens(doc.get("name"))}})
+        for doc in varieties.find({}, {"name": 1})
+    ]
+    if ops:
+        varieties.bulk_write(ops, ordered=False)
+
+    Saree.ensure_indexes()
+    Variety.ensure_indexes()
+    print("Search tokens backfilled")
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    connect_db()
+    run()
@@ -0,0 +1,30 @@
+"""
+Replace the old unique index on category_invite_tokens.token with the
+(token, category) unique index, so one link can cover several categories.
+
+    python -m migrations.category_invite_token_indexes
+"""
+from dotenv import load_dotenv
+
+from db import connect_db
+from models.invite_token import CategoryInviteToken, InviteToken
+
+
+def run():
+    collection = CategoryInviteToken._get_collection()
+    indexes = collection.index_information()
+
+    old = indexes.get("token_1")
+    if old and old.get("unique"):
+        collection.drop_index("token_1")
+        print("Dropped unique token_1")
+
+    CategoryInviteToken.ensure_indexes()
+    InviteToken.ensure_indexes()
+    print("Invite token indexes in place")
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    connect_db()
+    run()
@@ -0,0 +1,28 @@
+"""
+Create every declared index (models/indexes.py) and report indexes that
+exist in the database but are no longer declared. Idempotent.
+
+    python -m migrations.ensure_indexes
+"""
+from dotenv import load_dotenv
+
+from db import connect_db
+from models.indexes import compare_indexes, ensure_indexes
+
+
+def run():
+    ensure_indexes()
+    print("Declared indexes in place")
+
+    # extra indexes are only reported; dropping one is a deliberate migration
+    for collection, diff in compare_indexes().items():
+        for spec in diff["missing"]:
+            print(f"{collection}: still missing {spec}")
+        for spec in diff["extra"]:
+            print(f"{collection}: undeclared {spec}")
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    connect_db()
+    run()
@@ -0,0 +1,49 @@
+"""
+Rewrite legacy S3 / CloudFront image URLs on sarees to bare storage keys.
+
+    python -m migrations.normalize_image_urls [--dry-run] [--batch-size 500]
+"""
+import argparse
+
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+
+from db import connect_db
+from models.saree import Saree, normalize_image_key
+
+
+def run(dry_run=False, batch_size=500):
+    collection = Saree._get_collection()
+
+    ops = []
+    rewritten = 0
+    for doc in collection.find({"image_urls": {"$regex": "^http"}}, {"image_urls": 1}):
+        keys = [normalize_image_key(url) for url in doc.get("image_urls") or []]
+        if keys == doc.get("image_urls"):
+            continue
+
+        rewritten += 1
+        if dry_run:
+            print(doc["_id"], doc["image_urls"], "->", keys)
+            continue
+
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"image_urls": keys}}))
+        if len(ops) >= batch_size:
+            collection.bulk_write(ops, ordered=False)
+            ops = []
+
+    if ops:
+        collection.bulk_write(ops, ordered=False)
+
+    print(f"{'Would rewrite' if dry_run else 'Rewrote'} {rewritten} sarees")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    load_dotenv()
+    connect_db()
+    run(dry_run=args.dry_run, batch_size=args.batch_size)
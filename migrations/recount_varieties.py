@@ -0,0 +1,16 @@
+"""
+Recompute Variety.total_saree_count / published_saree_count and repair drift.
+
+    python -m migrations.recount_varieties
+"""
+from dotenv import load_dotenv
+
+from db import connect_db
+from models.variety import reconcile_variety_counts
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    connect_db()
+    for row in reconcile_variety_counts():
+        print("repaired", row)
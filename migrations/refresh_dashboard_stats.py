@@ -0,0 +1,16 @@
+"""
+Recompute the materialized /admin/dashboard/stats document from scratch.
+
+    python -m migrations.refresh_dashboard_stats
+"""
+from dotenv import load_dotenv
+
+from db import connect_db
+from models.dashboard_stats import refresh_dashboard_stats
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    connect_db()
+    stats = refresh_dashboard_stats()
+    print({k: v for k, v in stats.items() if k != "by_variety"})
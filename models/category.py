@@ -1,9 +1,10 @@
 from datetime import datetime
 import pytz
+from bson import ObjectId
 from mongoengine import (
     Document, EmbeddedDocument,
     StringField, DateTimeField,
-    EmbeddedDocumentField, ListField, ReferenceField
+    EmbeddedDocumentField, ListField, ReferenceField, IntField
 )
 from models.saree import Saree
 
@@ -21,10 +22,126 @@ class AdminMeta(EmbeddedDocument):
 
 class Category(Document):
     name = StringField(required=True, unique=True)
-    sarees = ListField(ReferenceField(Saree, reverse_delete_rule=2))  # CASCADE
+    # PULL: a deleted saree leaves its categories (delete_saree detaches it
+    # through detach_saree so saree_count follows; this is the backstop)
+    sarees = ListField(ReferenceField(Saree, reverse_delete_rule=4))  # PULL
+    # ✅ len(sarees), kept in step by every membership write
+    saree_count = IntField(default=0)
     admin = EmbeddedDocumentField(AdminMeta)
 
     meta = {
         "collection": "categories",
-        "indexes": ["name"]
+        "indexes": [
+            "name",
+            # admin list sorted by count (asc, or desc via a reverse scan)
+            {"fields": ["saree_count", "name"]},
+            # Saree's reverse_delete_rule looks categories up by member
+            "sarees"
+        ]
     }
+
+
+def sync_saree_membership(category_id, added=(), removed=()):
+    """Mirror Category.sarees changes onto Saree.categories"""
+    if added:
+        Saree.objects(id__in=list(added)).update(add_to_set__categories=category_id)
+    if removed:
+        Saree.objects(id__in=list(removed)).update(pull__categories=category_id)
+
+
+def recount_category_sarees():
+    """Recompute saree_count for every category server-side with $size"""
+    Category.objects.aggregate([
+        {"$project": {"saree_count": {"$size": {"$ifNull": ["$sarees", []]}}}},
+        {"$merge": {"into": "categories", "whenMatched": "merge", "whenNotMatched": "discard"}}
+    ])
+
+
+def to_object_ids(values):
+    """Ordered, de-duplicated ObjectIds; raises bson.errors.InvalidId / TypeError"""
+    seen = {}
+    for value in values:
+        seen.setdefault(ObjectId(value), None)
+    return list(seen)
+
+
+def existing_saree_ids(saree_ids):
+    """The subset of saree_ids that exist, in the given order (ids only, no documents)"""
+    found = set(Saree._get_collection().distinct("_id", {"_id": {"$in": saree_ids}}))
+    return [i for i in saree_ids if i in found]
+
+
+def _with_count(sarees_expr):
+    # rewrite the array and its cached length in the same atomic update
+    return [
+        {"$set": {"sarees": sarees_expr}},
+        {"$set": {"saree_count": {"$size": "$sarees"}}}
+    ]
+
+
+def add_category_sarees(category_id, saree_ids):
+    """$addToSet semantics (appends, keeps order); returns False if no such category"""
+    current = {"$ifNull": ["$sarees", []]}
+    result = Category._get_collection().update_one({"_id": category_id}, _with_count({
+        "$concatArrays": [current, {
+            "$filter": {"input": saree_ids, "cond": {"$not": [{"$in": ["$$this", current]}]}}
+        }]
+    }))
+    if result.matched_count:
+        sync_saree_membership(category_id, added=saree_ids)
+    return bool(result.matched_count)
+
+
+def remove_category_sarees(category_id, saree_ids, require_member=False):
+    """$pull semantics; returns False if nothing matched"""
+    query = {"_id": category_id}
+    if require_member:
+        query["sarees"] = {"$in": saree_ids}
+
+    result = Category._get_collection().update_one(query, _with_count({
+        "$filter": {
+            "input": {"$ifNull": ["$sarees", []]},
+            "cond": {"$not": [{"$in": ["$$this", saree_ids]}]}
+        }
+    }))
+    if result.matched_count:
+        sync_saree_membership(category_id, removed=saree_ids)
+    return bool(result.matched_count)
+
+
+def detach_saree(saree_id):
+    """Drop a saree about to be deleted from every category holding it"""
+    Category._get_collection().update_many({"sarees": saree_id}, _with_count({
+        "$filter": {
+            "input": {"$ifNull": ["$sarees", []]},
+            "cond": {"$ne": ["$$this", saree_id]}
+        }
+    }))
+
+
+def replace_category_sarees(category_id, saree_ids):
+    """Set membership to saree_ids, touching only the sarees that changed.
+    Returns (added, removed) or None if no such category."""
+    collection = Category._get_collection()
+    new_ids = existing_saree_ids(saree_ids)
+
+    # compare-and-set on the array the diff is taken from: a concurrent
+    # replace makes this match nothing, and the diff is retaken from its result
+    while True:
+        current = collection.find_one({"_id": category_id}, {"sarees": 1})
+        if current is None:
+            return None
+
+        diffed = current.get("sarees")
+        result = collection.update_one(
+            {"_id": category_id, "sarees": diffed},
+            {"$set": {"sarees": new_ids, "saree_count": len(new_ids)}}
+        )
+        if result.matched_count:
+            break
+
+    old_ids = set(diffed or [])
+    added = [i for i in new_ids if i not in old_ids]
+    removed = list(old_ids - set(new_ids))
+    sync_saree_membership(category_id, added=added, removed=removed)
+    return added, removed
@@ -0,0 +1,198 @@
+"""
+Materialized /admin/dashboard/stats.
+
+A single dashboard_stats document holds every number the dashboard
+shows. The saree, variety, category and invite write paths keep it
+current with $inc, so a dashboard load is one find_one instead of exact
+counts over each collection.
+
+refresh_dashboard_stats() recomputes it from scratch. That happens when
+the document doesn't exist yet, in a background thread once it is older
+than DASHBOARD_STATS_REFRESH_SECONDS (repairs drift from writes that
+bypass the hooks, e.g. a shell session), and on demand. Every $inc also
+bumps `version`, and the recount is only written if the version hasn't
+moved meanwhile, so increments landing during a recount are never lost.
+"""
+import os
+import threading
+from datetime import datetime, timezone
+
+from mongoengine import (
+    Document, EmbeddedDocument,
+    StringField, IntField, DateTimeField,
+    ListField, EmbeddedDocumentField
+)
+
+STATS_KEY = "dashboard"
+REFRESH_SECONDS = int(os.getenv("DASHBOARD_STATS_REFRESH_SECONDS", 3600))
+# recounts retried when a write moves the version mid-recount
+REFRESH_ATTEMPTS = 3
+
+_refreshing = threading.Lock()
+
+
+class VarietyStats(EmbeddedDocument):
+    name = StringField()
+    total = IntField(default=0)
+    published = IntField(default=0)
+
+
+class DashboardStats(Document):
+    key = StringField(required=True, unique=True)
+    sarees_published = IntField(default=0)
+    sarees_unpublished = IntField(default=0)
+    categories = IntField(default=0)
+    varieties = IntField(default=0)
+    # device-locked links / category links (one per token, however many categories)
+    active_invites = IntField(default=0)
+    active_category_invites = IntField(default=0)
+    by_variety = ListField(EmbeddedDocumentField(VarietyStats))
+    refreshed_at = DateTimeField()
+    # bumped by every incremental write, compared by refresh_dashboard_stats()
+    version = IntField(default=0)
+
+    meta = {"collection": "dashboard_stats"}
+
+
+def _update(update, array_filters=None):
+    # no upsert: a missing document is rebuilt by refresh_dashboard_stats()
+    # on the next read, and $[] paths can't be upserted anyway
+    update.setdefault("$inc", {})["version"] = 1
+    DashboardStats._get_collection().update_one(
+        {"key": STATS_KEY}, update, array_filters=array_filters
+    )
+
+
+def record_counts(**deltas):
+    """$inc plain counters, e.g. record_counts(categories=-1)"""
+    inc = {field: delta for field, delta in deltas.items() if delta}
+    if inc:
+        _update({"$inc": inc})
+
+
+def record_saree_deltas(deltas):
+    """Same {variety_name: (total_delta, published_delta)} as
+    apply_count_deltas, applied to the totals and the variety breakdown"""
+    total = sum(t for t, _ in deltas.values())
+    published = sum(p for _, p in deltas.values())
+
+    inc = {}
+    if published:
+        inc["sarees_published"] = published
+    if total - published:
+        inc["sarees_unpublished"] = total - published
+
+    # arrayFilters address a variety by name, whatever characters it holds
+    array_filters = []
+    for i, (name, (t, p)) in enumerate(deltas.items()):
+        if not name or not (t or p):
+            continue
+        if t:
+            inc[f"by_variety.$[v{i}].total"] = t
+        if p:
+            inc[f"by_variety.$[v{i}].published"] = p
+        array_filters.append({f"v{i}.name": name})
+
+    if inc:
+        _update({"$inc": inc}, array_filters or None)
+
+
+def record_variety_added(name):
+    _update({
+        "$inc": {"varieties": 1},
+        "$push": {"by_variety": {"name": name, "total": 0, "published": 0}}
+    })
+
+
+def record_variety_renamed(old_name, new_name):
+    if old_name != new_name:
+        _update({"$set": {"by_variety.$[v].name": new_name}}, [{"v.name": old_name}])
+
+
+def _recount():
+    from models.category import Category
+    from models.invite_token import CategoryInviteToken, InviteToken
+    from models.saree import Saree
+    from models.variety import Variety
+
+    counts = {
+        row["_id"]: (row["total"], row["published"])
+        for row in Saree._get_collection().aggregate([
+            {"$group": {
+                "_id": "$variety",
+                "total": {"$sum": 1},
+                "published": {"$sum": {"$cond": [{"$eq": ["$status", "published"]}, 1, 0]}}
+            }}
+        ])
+    }
+    total = sum(t for t, _ in counts.values())
+    published = sum(p for _, p in counts.values())
+    names = sorted(Variety._get_collection().distinct("name"))
+
+    return {
+        "key": STATS_KEY,
+        "sarees_published": published,
+        "sarees_unpublished": total - published,
+        "categories": Category._get_collection().count_documents({}),
+        "varieties": len(names),
+        "active_invites": InviteToken._get_collection().count_documents({"is_active": True}),
+        "active_category_invites": len(
+            CategoryInviteToken._get_collection().distinct("token", {"is_active": True})
+        ),
+        "by_variety": [
+            {"name": name, "total": counts.get(name, (0, 0))[0], "published": counts.get(name, (0, 0))[1]}
+            for name in names
+        ],
+        "refreshed_at": datetime.now(timezone.utc),
+    }
+
+
+def refresh_dashboard_stats():
+    """Recount everything exactly and replace the document unless a write
+    landed meanwhile (then recount again); returns the recount as a dict"""
+    collection = DashboardStats._get_collection()
+    # a placeholder to version against, so writes during the first recount
+    # count too (by_variety exists so their $[] updates don't fail)
+    collection.update_one(
+        {"key": STATS_KEY},
+        {"$setOnInsert": {"version": 0, "by_variety": []}},
+        upsert=True
+    )
+
+    for _ in range(REFRESH_ATTEMPTS):
+        # None also matches documents written before `version` existed
+        version = collection.find_one({"key": STATS_KEY}, {"version": 1}).get("version")
+        stats = {**_recount(), "version": version or 0}
+        if collection.replace_one({"key": STATS_KEY, "version": version}, stats).matched_count:
+            return stats
+
+    # still exact as of the recount; the next refresh gets to store it
+    return stats
+
+
+def _refresh_in_background():
+    # one refresh per worker at a time; everyone else keeps serving the old numbers
+    if not _refreshing.acquire(blocking=False):
+        return
+
+    def run():
+        try:
+            refresh_dashboard_stats()
+        finally:
+            _refreshing.release()
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def get_dashboard_stats():
+    stats = DashboardStats._get_collection().find_one({"key": STATS_KEY})
+    if stats is None or stats.get("refreshed_at") is None:
+        return refresh_dashboard_stats()
+
+    refreshed_at = stats.get("refreshed_at")
+    if REFRESH_SECONDS and (
+        refreshed_at is None or
+        (datetime.now(timezone.utc) - refreshed_at.replace(tzinfo=timezone.utc)).total_seconds() > REFRESH_SECONDS
+    ):
+        _refresh_in_background()
+    return stats
@@ -0,0 +1,46 @@
+"""
+The declared index set of every model, created on demand.
+
+mongoengine builds a model's indexes the first time the model touches
+its collection in a process, which on a large collection means a request
+waiting on an index build. ensure_indexes() creates them all up front;
+it is idempotent, so it is safe on every deploy:
+
+    python -m migrations.ensure_indexes
+
+or set ENSURE_INDEXES_ON_STARTUP=1 to run it when the app (or each
+gunicorn worker) connects.
+"""
+import os
+
+from models.admin_user import AdminUser
+from models.category import Category
+from models.dashboard_stats import DashboardStats
+from models.invite_token import CategoryInviteToken, InviteToken
+from models.saree import Counter, Saree
+from models.variety import Variety
+
+DOCUMENTS = [Saree, Variety, Category, CategoryInviteToken, InviteToken, AdminUser, Counter, DashboardStats]
+
+ENSURE_INDEXES_ON_STARTUP = os.getenv("ENSURE_INDEXES_ON_STARTUP") == "1"
+
+
+def ensure_indexes():
+    for document_cls in DOCUMENTS:
+        document_cls.ensure_indexes()
+
+
+def compare_indexes():
+    """{collection: {"missing": [...], "extra": [...]}} for collections whose
+    indexes differ from the declarations"""
+    drift = {}
+    for document_cls in DOCUMENTS:
+        diff = document_cls.compare_indexes()
+        if diff["missing"] or diff["extra"]:
+            drift[document_cls._get_collection_name()] = diff
+    return drift
+
+
+def ensure_indexes_on_startup():
+    if ENSURE_INDEXES_ON_STARTUP:
+        ensure_indexes()
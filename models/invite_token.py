@@ -1,5 +1,6 @@
 from mongoengine import Document, StringField, BooleanField, DateTimeField,ReferenceField
 from datetime import datetime
+from pymongo import ReturnDocument
 from models.category import Category
 class InviteToken(Document):
     token = StringField(required=True, unique=True)
@@ -10,11 +11,15 @@ class InviteToken(Document):
 
     created_at = DateTimeField(default=datetime.utcnow)
 
-    meta = {"collection": "invite_tokens"}
+    meta = {
+        "collection": "invite_tokens",
+        "indexes": [("token", "is_active")]
+    }
 
 
 class CategoryInviteToken(Document):
-    token = StringField(required=True, unique=True)
+    # one document per (token, category): a multi-category link shares its token
+    token = StringField(required=True)
     category = ReferenceField(Category, required=True)
     is_active = BooleanField(default=True)
     locked_device_id = StringField()
@@ -22,5 +27,41 @@ class CategoryInviteToken(Document):
 
     meta = {
         "collection": "category_invite_tokens",
-        "indexes": ["token", "category"]
+        "indexes": [
+            {"fields": ["token", "category"], "unique": True},
+            ("token", "is_active"),
+            "category"
+        ]
     }
+
+
+def valid_token(token):
+    # JSON bodies can carry objects; a dict here would reach filters as an operator
+    return isinstance(token, str) and bool(token)
+
+
+def valid_device_id(device_id):
+    # a "$..." string inside the update pipeline would be read as a field path
+    return isinstance(device_id, str) and bool(device_id) and not device_id.startswith("$")
+
+
+def lock_to_device(document_cls, query, device_id):
+    """Lock-on-first-use in one round trip.
+
+    Atomically sets locked_device_id on the first active invite matching
+    `query` if it is still unlocked, and returns that invite as it was
+    *before* the update (None if there is no active invite). The caller
+    compares the previous locked_device_id with device_id:
+    empty -> this call locked it, equal -> same device, else -> another device.
+    """
+    current_lock = {"$ifNull": ["$locked_device_id", ""]}
+    device = {"$literal": device_id}
+    return document_cls._get_collection().find_one_and_update(
+        {**query, "is_active": True},
+        [{"$set": {"locked_device_id": {
+            "$cond": [{"$in": [current_lock, ["", device]]}, device, "$locked_device_id"]
+        }}}],
+        sort=[("_id", 1)],
+        projection={"locked_device_id": 1},
+        return_document=ReturnDocument.BEFORE
+    )
@@ -2,12 +2,38 @@ from mongoengine import (
     Document,
     StringField,
     ListField,
-    URLField,
     FloatField,
     DateTimeField,
     IntField,
+    ObjectIdField,
 )
 from datetime import datetime, timezone
+import os
+import threading
+
+from pymongo import UpdateOne
+
+from utils.search import search_tokens
+
+# ✅ images are stored as bucket keys ("sarees/x.jpeg"), the CDN is joined on output
+CDN_BASE_URL = os.getenv("CDN_BASE_URL", "https://d34wwgjscxms4y.cloudfront.net").rstrip("/")
+
+
+def normalize_image_key(url):
+    """Reduce a legacy S3 / CDN URL to its storage key; keys pass through"""
+    if not url.startswith("http"):
+        return url.lstrip("/")
+    if url.startswith(CDN_BASE_URL + "/"):
+        return url[len(CDN_BASE_URL) + 1:]
+    # same rule the old per-request rewrite used
+    return url.split(".com/")[-1] if ".com/" in url else url.split("/")[-1]
+
+
+def cdn_url(key):
+    # documents not yet migrated may still hold full URLs
+    if key.startswith("http"):
+        key = normalize_image_key(key)
+    return f"{CDN_BASE_URL}/{key}"
 
 
 # ✅ Counter collection
@@ -17,26 +43,97 @@ class Counter(Document):
     meta = {"collection": "counters"}
 
 
-def get_next_saree_number():
+def reserve_saree_numbers(count):
+    """Reserve `count` consecutive saree numbers with one $inc; returns the first"""
     counter = Counter.objects(name="saree").modify(
         upsert=True,
         new=True,
-        inc__seq=1
+        inc__seq=count
     )
-    return counter.seq
+    return counter.seq - count + 1
+
+
+class SareeNumberAllocator:
+    """Hands out saree numbers from a locally reserved block.
+
+    Each process reserves `block_size` numbers with one $inc on the
+    counters document and serves them from memory, so inserts no longer
+    queue on that single hot document.
+
+    Gap policy: names stay unique but are not contiguous or globally
+    ordered by creation time. Numbers left in a block when a worker
+    exits (or forks) are never handed out. Set SAREE_NUMBER_BLOCK_SIZE=1
+    for the old strictly sequential behaviour.
+    """
+
+    def __init__(self, block_size):
+        self.block_size = max(int(block_size), 1)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._next = 0
+        self._end = 0  # exclusive
+
+    def next(self):
+        with self._lock:
+            if self._next >= self._end:
+                self._next = reserve_saree_numbers(self.block_size)
+                self._end = self._next + self.block_size
+            number = self._next
+            self._next += 1
+            return number
+
+
+_allocator = SareeNumberAllocator(os.getenv("SAREE_NUMBER_BLOCK_SIZE", 100))
+
+# a forked child must not reuse the parent's block
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_allocator.reset)
+
+
+def get_next_saree_number():
+    return _allocator.next()
 
 
 class Saree(Document):
     name = StringField(required=False)   # ✅ optional (auto generated)
-    image_urls = ListField(URLField(), default=list)
+    image_urls = ListField(StringField(), default=list)  # storage keys
     variety = StringField()
     remarks = StringField()
     min_price = FloatField(required=True)
     max_price = FloatField(required=True)
     last_edited_at = DateTimeField(default=lambda: datetime.now(timezone.utc))
     status = StringField(choices=["published", "unpublished"], default="published")
+    # ✅ denormalized copy of Category.sarees membership (multikey indexed)
+    categories = ListField(ObjectIdField(), default=list)
+    # ✅ lowercase word prefixes of name / variety / remarks for admin search
+    search_tokens = ListField(StringField(), default=list)
 
-    meta = {"collection": "sarees"}
+    meta = {
+        "collection": "sarees",
+        "indexes": [
+            # ✅ keyset pagination for /client/sarees (newest first)
+            {"fields": ["status", "-last_edited_at", "-id"]},
+            # ✅ token-scoped catalog pages
+            {"fields": ["status", "categories", "-last_edited_at", "-id"]},
+            # ✅ per-variety grouping of the published catalog
+            {"fields": ["status", "variety"]},
+            # ✅ admin /sarees: listed by name, optionally within one variety
+            # (variety renames update by variety too)
+            {"fields": ["name"]},
+            {"fields": ["variety", "name"]},
+            # ✅ category delete pulls its id from every member saree
+            {"fields": ["categories"]},
+            # ✅ admin search: prefix tokens, plus a weighted text index for relevance
+            {"fields": ["search_tokens", "name"]},
+            {
+                "fields": ["$name", "$variety", "$remarks"],
+                "default_language": "none",
+                "weights": {"name": 10, "variety": 5, "remarks": 1}
+            },
+        ]
+    }
 
     def save(self, *args, **kwargs):
         # ✅ auto name
@@ -44,27 +141,22 @@ class Saree(Document):
             num = get_next_saree_number()
             self.name = f"Saree{num:03d}"
 
-        self.last_edited_at = datetime.now(timezone.utc)
+        self.prepare_for_write()
         return super().save(*args, **kwargs)
 
-    def to_json(self):
-        cloudfront_domain = "https://d34wwgjscxms4y.cloudfront.net"
-
-        updated_image_urls = []
-        for url in self.image_urls:
-            # If already full URL, replace domain
-            if url.startswith("http"):
-                # Extract file path after last '/'
-                file_path = url.split(".com/")[-1] if ".com/" in url else url.split("/")[-1]
-                updated_image_urls.append(f"{cloudfront_domain}/{file_path}")
-            else:
-                # If stored as relative path
-                updated_image_urls.append(f"{cloudfront_domain}/{url}")
+    def prepare_for_write(self):
+        """Derived fields; also used by bulk inserts that skip save()"""
+        # ✅ normalize once at write time instead of on every read
+        self.image_urls = [normalize_image_key(url) for url in self.image_urls]
+        self.search_tokens = search_tokens(self.name, self.variety, self.remarks)
 
+        self.last_edited_at = datetime.now(timezone.utc)
+
+    def to_json(self):
         return {
             "id": str(self.id),
             "name": self.name,
-            "image_urls": updated_image_urls,
+            "image_urls": [cdn_url(key) for key in self.image_urls],
             "variety": self.variety,
             "remarks": self.remarks,
             "min_price": self.min_price,
@@ -72,3 +164,52 @@ class Saree(Document):
             "status": self.status,
             "last_edited_at": self.last_edited_at.isoformat()
         }
+
+
+# ✅ the fields to_json() reads: list endpoints project to these and
+# serialize the raw documents with saree_doc_to_json()
+SAREE_JSON_FIELDS = (
+    "name", "image_urls", "variety", "remarks",
+    "min_price", "max_price", "status", "last_edited_at",
+)
+SAREE_JSON_PROJECTION = {field: 1 for field in SAREE_JSON_FIELDS}
+
+
+def _as_float(value):
+    return float(value) if isinstance(value, int) else value
+
+
+def saree_doc_to_json(doc):
+    """Saree.to_json() for a raw pymongo document (aggregation results,
+    the async catalog), without building a Document; defaults match the
+    field declarations above"""
+    return {
+        "id": str(doc["_id"]),
+        "name": doc.get("name"),
+        "image_urls": [cdn_url(key) for key in doc.get("image_urls") or []],
+        "variety": doc.get("variety"),
+        "remarks": doc.get("remarks"),
+        # FloatField hands back floats even for ints stored by older writers
+        "min_price": _as_float(doc.get("min_price")),
+        "max_price": _as_float(doc.get("max_price")),
+        "status": doc.get("status", "published"),
+        # legacy documents written before the field existed have none
+        "last_edited_at": doc["last_edited_at"].isoformat() if doc.get("last_edited_at") else None
+    }
+
+
+def refresh_search_tokens(match, batch_size=500):
+    """Recompute search_tokens for sarees matching a raw filter, e.g. after
+    a bulk update() that bypassed Saree.save()"""
+    collection = Saree._get_collection()
+
+    ops = []
+    for doc in collection.find(match, {"name": 1, "variety": 1, "remarks": 1}):
+        tokens = search_tokens(doc.get("name"), doc.get("variety"), doc.get("remarks"))
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"search_tokens": tokens}}))
+        if len(ops) >= batch_size:
+            collection.bulk_write(ops, ordered=False)
+            ops = []
+
+    if ops:
+        collection.bulk_write(ops, ordered=False)
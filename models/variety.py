@@ -2,12 +2,16 @@
 
 from datetime import datetime
 import pytz
+from pymongo import UpdateOne
 from mongoengine import (
     Document, EmbeddedDocument,
     StringField, DateTimeField,
-    EmbeddedDocumentField, IntField
+    EmbeddedDocumentField, IntField, ListField
 )
 
+from models.dashboard_stats import record_saree_deltas
+from utils.search import search_tokens
+
 IST = pytz.timezone("Asia/Kolkata")
 
 def ist_now():
@@ -23,6 +27,80 @@ class AdminMeta(EmbeddedDocument):
 class Variety(Document):
     name = StringField(required=True, unique=True)
     total_saree_count = IntField(default=0)
+    # ✅ maintained by the saree write paths, serves /client/varieties
+    published_saree_count = IntField(default=0)
     admin = EmbeddedDocumentField(AdminMeta)
+    search_tokens = ListField(StringField(), default=list)
+
+    meta = {
+        "collection": "varieties",
+        "indexes": [
+            "search_tokens",
+            # admin list sorted by count; name is covered by its unique index
+            {"fields": ["total_saree_count", "name"]},
+        ]
+    }
+
+    def save(self, *args, **kwargs):
+        self.search_tokens = search_tokens(self.name)
+        return super().save(*args, **kwargs)
+
+
+def apply_count_deltas(deltas):
+    """Apply {variety_name: (total_delta, published_delta)} as atomic $inc
+    updates, all in one round trip"""
+    ops = []
+    for name, (total, published) in deltas.items():
+        inc = {}
+        if total:
+            inc["total_saree_count"] = total
+        if published:
+            inc["published_saree_count"] = published
+        if name and inc:
+            ops.append(UpdateOne({"name": name}, {"$inc": inc}))
+
+    if ops:
+        Variety._get_collection().bulk_write(ops, ordered=False)
+    record_saree_deltas(deltas)
+
+
+def reconcile_variety_counts():
+    """Recompute both saree counts for every variety in one aggregation
+    and repair any drift. Returns the varieties that were fixed."""
+    from models.saree import Saree
+
+    counts = {
+        row["_id"]: (row["total"], row["published"])
+        for row in Saree.objects.aggregate([
+            {"$group": {
+                "_id": "$variety",
+                "total": {"$sum": 1},
+                "published": {"$sum": {"$cond": [{"$eq": ["$status", "published"]}, 1, 0]}}
+            }}
+        ])
+    }
+
+    ops = []
+    repaired = []
+    for variety in Variety.objects.only("name", "total_saree_count", "published_saree_count"):
+        total, published = counts.get(variety.name, (0, 0))
+        if (variety.total_saree_count, variety.published_saree_count) != (total, published):
+            ops.append(UpdateOne(
+                {"_id": variety.id},
+                {"$set": {"total_saree_count": total, "published_saree_count": published}}
+            ))
+            repaired.append({
+                "name": variety.name,
+                "before": {
+                    "total_saree_count": variety.total_saree_count,
+                    "published_saree_count": variety.published_saree_count
+                },
+                "after": {
+                    "total_saree_count": total,
+                    "published_saree_count": published
+                }
+            })
 
-    meta = {"collection": "varieties"}
+    if ops:
+        Variety._get_collection().bulk_write(ops, ordered=False)
+    return repaired
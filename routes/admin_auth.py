@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from models.admin_user import AdminUser
 from flask_jwt_extended import create_access_token
+from utils.admin_identity import admin_claims
 import os
 
 admin_auth_bp = Blueprint("admin_auth", __name__)
@@ -20,7 +21,11 @@ def admin_login():
     if not admin:
         return jsonify({"message": "Invalid username or password"}), 401
 
-    token = create_access_token(identity=str(admin.id))
+    # ✅ username / full_name ride along so writes don't look the admin up
+    token = create_access_token(
+        identity=str(admin.id),
+        additional_claims=admin_claims(admin)
+    )
 
     return jsonify({
         "token": token,
@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
 from models.admin_user import AdminUser
+from utils.admin_identity import forget_admin
 import os
 
 admin_bp = Blueprint("admin_user", __name__)
@@ -41,4 +42,5 @@ def delete_admin_user(user_id):
         return jsonify({"message": "User not found"}), 404
 
     user.delete()
+    forget_admin(user_id)
     return jsonify({"message": "User deleted"}), 200
@@ -1,12 +1,20 @@
 from flask import Blueprint, request, jsonify, abort
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from mongoengine.errors import DoesNotExist, ValidationError
+from bson import ObjectId
+from bson.errors import InvalidId
 from datetime import datetime
 import pytz
 
-from models.category import Category, AdminMeta
-from models.admin_user import AdminUser
+from models.category import (
+    Category, AdminMeta,
+    to_object_ids, existing_saree_ids,
+    add_category_sarees, remove_category_sarees, replace_category_sarees
+)
+from utils.admin_identity import current_admin
 from models.saree import Saree
+from utils.catalog_cache import bump_catalog_version
+from models.dashboard_stats import record_counts
 
 IST = pytz.timezone("Asia/Kolkata")
 
@@ -21,7 +29,7 @@ def add_category():
     if not name:
         return jsonify({"message": "Name is required"}), 400
 
-    admin = AdminUser.objects(id=get_jwt_identity()).first()
+    admin = current_admin()
     if not admin:
         return jsonify({"message": "Invalid admin"}), 401
 
@@ -34,6 +42,7 @@ def add_category():
         )
     )
     category.save()
+    record_counts(categories=1)
 
     return jsonify({"message": "Category created"}), 201
 
@@ -52,7 +61,9 @@ def edit_category(category_id):
     except DoesNotExist:
         abort(404, "Category not found")
 
-    admin = AdminUser.objects(id=get_jwt_identity()).first()
+    admin = current_admin()
+    if not admin:
+        return jsonify({"message": "Invalid admin"}), 401
 
     category.name = name
     category.admin.username = admin.username
@@ -71,50 +82,105 @@ def delete_category(category_id):
     except DoesNotExist:
         abort(404, "Category not found")
 
+    # ✅ drop the denormalized membership from its sarees
+    Saree.objects(categories=category.id).update(pull__categories=category.id)
     category.delete()
+    record_counts(categories=-1)
+    bump_catalog_version()
     return jsonify({"message": "Category deleted"}), 200
 
 
-@category_bp.route("/admin/category/<category_id>/sarees", methods=["PUT"])
-@jwt_required()
-def update_category_sarees(category_id):
-    data = request.json
+def _saree_ids_from_body():
+    """(ObjectIds, None) or (None, error response)"""
+    data = request.json or {}
     saree_ids = data.get("saree_ids", [])
 
     if not isinstance(saree_ids, list):
-        return jsonify({"message": "saree_ids must be a list"}), 400
+        return None, (jsonify({"message": "saree_ids must be a list"}), 400)
 
     try:
-        category = Category.objects.get(id=category_id)
-    except DoesNotExist:
+        return to_object_ids(saree_ids), None
+    except (InvalidId, TypeError):
+        return None, (jsonify({"message": "Invalid saree id"}), 400)
+
+
+def _category_object_id(category_id):
+    try:
+        return ObjectId(category_id)
+    except (InvalidId, TypeError):
         abort(404, "Category not found")
 
-    sarees = Saree.objects(id__in=saree_ids)
-    category.sarees = list(sarees)
-    category.save()
 
-    return jsonify({"message": "Sarees updated"}), 200
+@category_bp.route("/admin/category/<category_id>/sarees", methods=["PUT"])
+@jwt_required()
+def update_category_sarees(category_id):
+    saree_ids, error = _saree_ids_from_body()
+    if error:
+        return error
 
+    # ✅ diff computed from ids only, only changed sarees are touched
+    diff = replace_category_sarees(_category_object_id(category_id), saree_ids)
+    if diff is None:
+        abort(404, "Category not found")
 
-@category_bp.route("/admin/category/<category_id>/saree/<saree_id>", methods=["DELETE"])
+    added, removed = diff
+    if added or removed:
+        bump_catalog_version()
+
+    return jsonify({
+        "message": "Sarees updated",
+        "added": len(added),
+        "removed": len(removed)
+    }), 200
+
+
+@category_bp.route("/admin/category/<category_id>/sarees/add", methods=["POST"])
 @jwt_required()
-def remove_saree_from_category(category_id, saree_id):
-    try:
-        category = Category.objects.get(id=category_id)
-    except DoesNotExist:
+def add_sarees_to_category(category_id):
+    saree_ids, error = _saree_ids_from_body()
+    if error:
+        return error
+
+    saree_ids = existing_saree_ids(saree_ids)
+    if not add_category_sarees(_category_object_id(category_id), saree_ids):
+        abort(404, "Category not found")
+
+    bump_catalog_version()
+    return jsonify({"message": "Sarees added"}), 200
+
+
+@category_bp.route("/admin/category/<category_id>/sarees/remove", methods=["POST"])
+@jwt_required()
+def remove_sarees_from_category(category_id):
+    saree_ids, error = _saree_ids_from_body()
+    if error:
+        return error
+
+    if not remove_category_sarees(_category_object_id(category_id), saree_ids):
         abort(404, "Category not found")
 
+    bump_catalog_version()
+    return jsonify({"message": "Sarees removed"}), 200
+
+
+@category_bp.route("/admin/category/<category_id>/saree/<saree_id>", methods=["DELETE"])
+@jwt_required()
+def remove_saree_from_category(category_id, saree_id):
+    category_oid = _category_object_id(category_id)
     try:
-        saree = Saree.objects.get(id=saree_id)
-    except DoesNotExist:
+        saree_oid = ObjectId(saree_id)
+    except (InvalidId, TypeError):
         abort(404, "Saree not found")
 
-    if saree not in category.sarees:
+    # ✅ one conditional $pull; the lookups below only run on the error path
+    if not remove_category_sarees(category_oid, [saree_oid], require_member=True):
+        if not Category.objects(id=category_oid).only("id").first():
+            abort(404, "Category not found")
+        if not Saree.objects(id=saree_oid).only("id").first():
+            abort(404, "Saree not found")
         return jsonify({"message": "Saree not in category"}), 400
 
-    category.sarees.remove(saree)
-    category.save()
-
+    bump_catalog_version()
     return jsonify({"message": "Saree removed from category"}), 200
 
 
@@ -132,7 +198,7 @@ import math
 @jwt_required()
 def get_categories():
     # --- Auth Admin ---
-    admin = AdminUser.objects(id=get_jwt_identity()).first()
+    admin = current_admin()
     if not admin:
         return jsonify({"message": "Invalid admin"}), 401
 
@@ -164,24 +230,31 @@ def get_categories():
     total_pages = math.ceil(total / per_page) if total > 0 else 1
 
     # --- Sorting ---
-    # MongoEngine sorting supports fields only.
-    # "total_saree_count" is derived, so we will sort manually after fetching a page.
-    if sort_by == "name":
-        mongo_sort = "name" if order == "asc" else "-name"
-        query = query.order_by(mongo_sort)
+    # ✅ saree_count is maintained on the category, so both sorts run in Mongo
+    sort_fields = {
+        "name": ["name"],
+        "total_saree_count": ["saree_count", "name"],
+    }
+    if sort_by in sort_fields:
+        prefix = "" if order == "asc" else "-"
+        query = query.order_by(*[prefix + f for f in sort_fields[sort_by]])
 
         # Apply Pagination
-        categories = query.skip((page - 1) * per_page).limit(per_page)
-
-        data = []
-        for c in categories:
-            saree_count = len(c.sarees) if c.sarees else 0
+        categories = (
+            query
+            .only("name", "saree_count")
+            .skip((page - 1) * per_page)
+            .limit(per_page)
+        )
 
-            data.append({
+        data = [
+            {
                 "id": str(c.id),
                 "name": c.name,
-                "total_saree_count": saree_count
-            })
+                "total_saree_count": c.saree_count
+            }
+            for c in categories
+        ]
 
         return jsonify({
             "page": page,
@@ -191,38 +264,6 @@ def get_categories():
             "data": data
         }), 200
 
-    # --- Sorting by total_saree_count (manual sorting) ---
-    # For this, we fetch ALL (search filtered), compute counts, then sort in Python.
-    # This is okay for small-medium datasets.
-    if sort_by == "total_saree_count":
-        categories_all = query  # filtered by search already
-
-        data_all = []
-        for c in categories_all:
-            saree_count = len(c.sarees) if c.sarees else 0
-
-            data_all.append({
-                "id": str(c.id),
-                "name": c.name,
-                "total_saree_count": saree_count
-            })
-
-        reverse = True if order == "desc" else False
-        data_all.sort(key=lambda x: x["total_saree_count"], reverse=reverse)
-
-        # Manual pagination
-        start = (page - 1) * per_page
-        end = start + per_page
-        data_page = data_all[start:end]
-
-        return jsonify({
-            "page": page,
-            "per_page": per_page,
-            "total": total,
-            "total_pages": total_pages,
-            "data": data_page
-        }), 200
-
     # --- Invalid sort_by fallback ---
     return jsonify({
         "message": "Invalid sort_by. Allowed: name, total_saree_count"
@@ -233,11 +274,11 @@ def get_categories():
 import math
 from flask import request, jsonify, abort
 from flask_jwt_extended import jwt_required
-from mongoengine.queryset.visitor import Q
 from mongoengine.errors import DoesNotExist
 
-from models.saree import Saree
+from models.saree import Saree, SAREE_JSON_PROJECTION, saree_doc_to_json
 from models.category import Category
+from utils.search import SEARCH_MODES, search_match
 
 @category_bp.route("/admin/category/<category_id>", methods=["GET"])
 @jwt_required()
@@ -257,8 +298,12 @@ def get_category_details(category_id):
 @jwt_required()
 def category_saree_picker(category_id):
     search = (request.args.get("search") or "").strip()
+    search_mode = request.args.get("search_mode", "prefix")
     variety = (request.args.get("variety") or "").strip()
 
+    if search_mode not in SEARCH_MODES:
+        return jsonify({"message": "Invalid search_mode. Allowed: prefix, text, substring"}), 400
+
     page = int(request.args.get("page", 1))
     per_page = int(request.args.get("per_page", 10))
 
@@ -270,67 +315,68 @@ def category_saree_picker(category_id):
     if per_page > 100:
         per_page = 100
 
-    # --- Fetch Category ---
-    try:
-        category = Category.objects.get(id=category_id)
-    except DoesNotExist:
+    # --- Fetch Category (ids only, no dereferencing) ---
+    category = Category._get_collection().find_one(
+        {"_id": _category_object_id(category_id)},
+        {"name": 1, "sarees": 1}
+    )
+    if not category:
         abort(404, "Category not found")
 
-    selected_ids = [str(s.id) for s in (category.sarees or [])]
+    selected_ids = category.get("sarees") or []
 
     # --- Base Query ---
-    query = Q()
+    match = {}
     if search:
-        query &= Q(name__icontains=search)
+        match.update(search_match(search, search_mode))
     if variety:
-        query &= Q(variety=variety)
-
-    # --- Selected Sarees First ---
-    selected_sarees = []
-    if selected_ids:
-        selected_sarees = list(Saree.objects(query & Q(id__in=selected_ids)))
-        selected_map = {str(s.id): s for s in selected_sarees}
-        selected_sarees = [selected_map[i] for i in selected_ids if i in selected_map]
-
-    # --- Remaining Sarees (excluding selected) ---
-    remaining_query = query
-    if selected_ids:
-        remaining_query &= Q(id__nin=selected_ids)
-
-    remaining_qs = Saree.objects(remaining_query).order_by("name")
-
-    # --- Counts ---
-    total_selected = len(selected_sarees)
-    total_remaining = remaining_qs.count()
-    total = total_selected + total_remaining
-    total_pages = math.ceil(total / per_page) if total > 0 else 1
+        match["variety"] = variety
+
+    # --- Selected first (in category order), then the rest by name ---
+    # Neither part sorts the catalog: the selected page slice is fetched
+    # by _id, the rest is a skip/limit walk of the name index (or the
+    # search's own index), so a page costs about its offset plus its size.
+    sarees = Saree._get_collection()
+    filtered = bool(match)
+
+    if filtered:
+        # bounded by the category, not the catalog
+        matching = set(sarees.distinct("_id", {**match, "_id": {"$in": selected_ids}}))
+        selected_ids = [i for i in selected_ids if i in matching]
+    selected_count = len(selected_ids)
+    total = sarees.count_documents(match) if filtered else sarees.estimated_document_count()
+
+    offset = (page - 1) * per_page
+    page_ids = selected_ids[offset:offset + per_page]
+    by_id = {
+        doc["_id"]: doc
+        for doc in sarees.find({"_id": {"$in": page_ids}}, SAREE_JSON_PROJECTION)
+    }
+    # a saree deleted since the category was read is simply skipped
+    docs = [by_id[i] for i in page_ids if i in by_id]
+
+    remaining = per_page - len(page_ids)
+    if remaining > 0:
+        rest = {**match, "categories": {"$ne": category["_id"]}}
+        projection = dict(SAREE_JSON_PROJECTION)
+        order = [("name", 1), ("_id", 1)]
+        # text mode: the unselected rest by relevance, like /sarees
+        if search and search_mode == "text":
+            projection["_score"] = {"$meta": "textScore"}
+            order = [("_score", {"$meta": "textScore"})] + order
+        docs += sarees.find(rest, projection).sort(order).skip(
+            max(offset - selected_count, 0)
+        ).limit(remaining)
 
-    # --- Pagination ---
-    skip = (page - 1) * per_page
-    limit = per_page
-    page_items = []
-
-    # take from selected first
-    if skip < total_selected:
-        selected_slice = selected_sarees[skip: skip + limit]
-        page_items.extend(selected_slice)
-        limit -= len(selected_slice)
-        skip = 0
-    else:
-        skip -= total_selected
-
-    # take rest from remaining
-    if limit > 0:
-        remaining_slice = remaining_qs.skip(skip).limit(limit)
-        page_items.extend(list(remaining_slice))
+    total_pages = math.ceil(total / per_page) if total > 0 else 1
 
     return jsonify({
-        "category_id": str(category.id),
-        "category_name": category.name,
+        "category_id": str(category["_id"]),
+        "category_name": category["name"],
         "page": page,
         "per_page": per_page,
         "total": total,
         "total_pages": total_pages,
-        "selected_count": total_selected,
-        "data": [s.to_json() for s in page_items]
+        "selected_count": selected_count,
+        "data": [saree_doc_to_json(doc) for doc in docs]
     }), 200
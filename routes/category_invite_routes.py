@@ -3,8 +3,15 @@ from flask_jwt_extended import jwt_required
 import secrets
 import os
 
-from models.invite_token import CategoryInviteToken
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from models.invite_token import CategoryInviteToken, lock_to_device, valid_device_id, valid_token
 from models.category import Category
+from utils.catalog_cache import bump_catalog_version
+from models.dashboard_stats import record_counts
+from utils import invite_cache
+from utils.client_session import issue_session, mark_revoked, SESSION_MAX_AGE_SECONDS
 
 category_invite_bp = Blueprint("category_invite_bp", __name__)
 @category_invite_bp.route("/invite/category/create", methods=["POST"])
@@ -15,6 +22,8 @@ def create_category_invite():
 
     if not category_id:
         return jsonify({"msg": "category_id required"}), 400
+    if not isinstance(category_id, str):
+        return jsonify({"msg": "Invalid category_id"}), 400
 
     category = Category.objects(id=category_id).first()
     if not category:
@@ -27,6 +36,9 @@ def create_category_invite():
         category=category,
         is_active=True
     ).save()
+    record_counts(active_category_invites=1)
+    # responses cached for ?token= before it existed were unscoped
+    bump_catalog_version()
 
     frontend_url = os.getenv("FRONTEND_URL", "http://localhost:5173")
 
@@ -47,29 +59,45 @@ def verify_category_invite():
 
     if not token or not device_id or not category_id:
         return jsonify({"allowed": False, "msg": "Missing required fields"}), 400
-
-    invite = CategoryInviteToken.objects(
-        token=token,
-        is_active=True,
-        category=category_id
-    ).first()
-
-    if not invite:
-        return jsonify({"allowed": False, "msg": "Invalid / Expired link"}), 403
-
-    # Lock first time
-    if not invite.locked_device_id:
-        invite.locked_device_id = device_id
-        invite.save()
-        return jsonify({"allowed": True}), 200
-
-    if invite.locked_device_id != device_id:
-        return jsonify({
+    if not valid_token(token) or not isinstance(category_id, str):
+        return jsonify({"allowed": False, "msg": "Invalid token or category_id"}), 400
+    if not valid_device_id(device_id):
+        return jsonify({"allowed": False, "msg": "Invalid device_id"}), 400
+
+    cached = invite_cache.get("category_link", token, device_id, category_id)
+    if cached:
+        return jsonify(cached[0]), cached[1]
+
+    try:
+        category_oid = ObjectId(category_id)
+    except (InvalidId, TypeError):
+        category_oid = None
+
+    # ✅ validate + lock first time in one atomic update
+    before = None
+    if category_oid:
+        before = lock_to_device(
+            CategoryInviteToken,
+            {"token": token, "category": category_oid},
+            device_id
+        )
+
+    if not before:
+        body, status = {"allowed": False, "msg": "Invalid / Expired link"}, 403
+    elif before.get("locked_device_id") and before["locked_device_id"] != device_id:
+        body, status = {
             "allowed": False,
             "msg": "Link already used on another device"
-        }), 403
+        }, 403
+    else:
+        body, status = {
+            "allowed": True,
+            "session": issue_session(token, device_id, [category_oid]),
+            "session_expires_in": SESSION_MAX_AGE_SECONDS
+        }, 200
 
-    return jsonify({"allowed": True}), 200
+    invite_cache.put("category_link", token, device_id, category_id, body=body, status=status)
+    return jsonify(body), status
 
 
 @category_invite_bp.route("/api/category-invite/disable", methods=["POST"])
@@ -80,12 +108,16 @@ def disable_category_invite():
 
     if not token:
         return jsonify({"msg": "token required"}), 400
+    if not valid_token(token):
+        return jsonify({"msg": "Invalid token"}), 400
 
-    invite = CategoryInviteToken.objects(token=token).first()
-    if not invite:
+    if CategoryInviteToken.objects(token=token, is_active=True).update(set__is_active=False):
+        record_counts(active_category_invites=-1)
+    elif not CategoryInviteToken.objects(token=token).only("id").first():
         return jsonify({"msg": "Token not found"}), 404
 
-    invite.is_active = False
-    invite.save()
+    invite_cache.invalidate_token(token)
+    mark_revoked(token)
 
+    bump_catalog_version()
     return jsonify({"msg": "Category token disabled"}), 200
@@ -1,113 +1,456 @@
-from flask import Blueprint, request, jsonify
-from models.saree import Saree
+from flask import Blueprint, request, jsonify, g
+from bson import ObjectId
+from bson.errors import InvalidId
+from datetime import datetime, timedelta
+import base64
+import binascii
+import math
+import os
+from models.saree import Saree, CDN_BASE_URL, SAREE_JSON_FIELDS, SAREE_JSON_PROJECTION, saree_doc_to_json
 from models.variety import Variety
 from models.invite_token import CategoryInviteToken
 from models.category import Category
 from mongoengine.errors import DoesNotExist, ValidationError
+from utils.cache import MemoryBackend
+from utils.client_session import load_session, is_revoked
+from utils.catalog_cache import (
+    catalog_cache, get_catalog_version, content_etag, not_modified
+)
 
 client_bp = Blueprint("client", __name__)
 
+EPOCH = datetime(1970, 1, 1)
+
+# ✅ totals barely move between scrolls, don't recount on every page
+TOTAL_CACHE_SECONDS = int(os.getenv("CLIENT_TOTAL_CACHE_SECONDS", 30))
+_total_cache = MemoryBackend(maxsize=1024, ttl=TOTAL_CACHE_SECONDS)
+
+# ✅ one page never pulls more than this many sarees
+MAX_PER_PAGE = int(os.getenv("CLIENT_MAX_PER_PAGE", 100))
+
+# ✅ /client/catalog price histogram edges (by min_price), override with ?price_buckets=
+DEFAULT_PRICE_BUCKETS = [
+    float(b) for b in os.getenv("CATALOG_PRICE_BUCKETS", "0,1000,2500,5000,10000,25000,50000").split(",")
+]
+
 
 def get_allowed_categories(token):
     """Get list of category IDs from a category invite token, or None if token is not category-based"""
     if not token:
         return None
     
-    invites = CategoryInviteToken.objects(token=token, is_active=True)
-    if invites:
-        return [str(invite.category.id) for invite in invites]
-    
+    # raw distinct: no per-invite dereference of the category
+    category_ids = CategoryInviteToken._get_collection().distinct(
+        "category", {"token": token, "is_active": True}
+    )
+    if category_ids:
+        return [str(c) for c in category_ids]
+
     return None
 
-@client_bp.route("/client/sarees", methods=["GET", "OPTIONS"])
-def list_sarees():
-    # Pagination
-    page = int(request.args.get("page", 1))
-    per_page = int(request.args.get("per_page", 12))
-    
-    # ✅ Optional token for category filtering
-    token = request.args.get("token")
-    allowed_categories = get_allowed_categories(token)
 
-    # ✅ Filters
-    # Old: ?variety=Silk
-    variety = request.args.get("variety")
+@client_bp.before_request
+def load_client_session():
+    """X-Client-Session header (or ?session=) from invite verification:
+    authorizes the request from its signature, no invite lookups"""
+    g.client_categories = None
+    if request.method == "OPTIONS":
+        return None
+
+    value = request.headers.get("X-Client-Session") or request.args.get("session")
+    if not value:
+        return None
+
+    payload = load_session(value)
+    if payload is None:
+        return jsonify({"message": "Invalid or expired session"}), 401
+    if is_revoked(payload["t"]):
+        return jsonify({"message": "Session revoked"}), 401
+
+    g.client_categories = payload["c"]
+    return None
+
+
+def _allowed_categories():
+    if g.client_categories is not None:
+        return g.client_categories
+
+    # ✅ Optional token for category filtering (legacy, one query per request)
+    return get_allowed_categories(request.args.get("token"))
+
+# The helpers below take plain values rather than reading `request`, so
+# the async catalog (routes/client_async.py) builds identical queries.
+
+def encode_cursor(last_edited_at, saree_id):
+    """Opaque cursor pointing just after a saree in (-last_edited_at, -_id) order.
+
+    Legacy sarees without last_edited_at sort after every dated one; their
+    cursor leaves the timestamp empty (a null sentinel) and the seek walks
+    that null tail by _id alone, so cursor mode returns what page mode does."""
+    millis = "" if last_edited_at is None else (
+        (last_edited_at.replace(tzinfo=None) - EPOCH) // timedelta(milliseconds=1)
+    )
+    raw = f"{millis}:{saree_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Returns (last_edited_at or None for the null tail, ObjectId) or raises ValueError"""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        millis, saree_id = base64.urlsafe_b64decode(padded).decode().split(":", 1)
+        if not millis:
+            return None, ObjectId(saree_id)
+        return EPOCH + timedelta(milliseconds=int(millis)), ObjectId(saree_id)
+    except (ValueError, TypeError, InvalidId, binascii.Error, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+
+def after_cursor(cursor):
+    """Raw filter seeking past `cursor` via the compound index; ValueError if invalid"""
+    last_edited_at, last_id = decode_cursor(cursor)
+    # None matches both null and a missing field
+    if last_edited_at is None:
+        return {"last_edited_at": None, "_id": {"$lt": last_id}}
+    return {"$or": [
+        {"last_edited_at": {"$lt": last_edited_at}},
+        {"last_edited_at": last_edited_at, "_id": {"$lt": last_id}},
+        # $lt never matches null: the undated tail comes after every date
+        {"last_edited_at": None}
+    ]}
 
+
+def parse_paging(args):
+    """(page, per_page) from the query string, page >= 1 and per_page
+    clamped to 1..MAX_PER_PAGE; ValueError when either isn't an integer"""
+    page = int(args.get("page", 1))
+    per_page = int(args.get("per_page", 12))
+    return max(page, 1), min(max(per_page, 1), MAX_PER_PAGE)
+
+
+def _price(value):
+    # float() also accepts "nan" / "inf", which would match nothing or everything
+    price = float(value)
+    if not math.isfinite(price):
+        raise ValueError(f"Invalid price {value!r}")
+    return price
+
+
+def parse_catalog_filters(args, allowed_categories):
+    """Storefront filters shared by /client/sarees and /client/catalog;
+    `args` is any multi-dict with get() / getlist(). ValueError when a
+    price isn't a finite number."""
     # ✅ New: ?varieties=Silk,Cotton or ?varieties=Silk&varieties=Cotton
-    varieties = request.args.getlist("varieties")
+    varieties = args.getlist("varieties")
 
     # If sent as comma-separated in a single param
     if len(varieties) == 1 and "," in varieties[0]:
         varieties = [v.strip() for v in varieties[0].split(",") if v.strip()]
 
-    min_price = request.args.get("min_price")
-    max_price = request.args.get("max_price")
+    # ✅ Backward compatibility: ?variety=Silk
+    if not varieties and args.get("variety"):
+        varieties = [args.get("variety")]
+
+    min_price = args.get("min_price")
+    max_price = args.get("max_price")
 
-    query = Saree.objects(status="published")
+    return {
+        "allowed_categories": allowed_categories,
+        "varieties": varieties,
+        "min_price": _price(min_price) if min_price else None,
+        "max_price": _price(max_price) if max_price else None,
+    }
 
-    # ✅ Filter by allowed categories if token is provided
-    if allowed_categories:
-        query = query.filter(category__in=allowed_categories)
+
+def catalog_match(filters, variety=True, price=True):
+    """Raw $match for the published catalog; facets switch off the
+    variety / price parts they aggregate over"""
+    match = {"status": "published"}
+
+    # ✅ Filter by allowed categories if token is provided (a session
+    # scoped to no categories sees nothing, not the whole catalog)
+    if filters["allowed_categories"] is not None:
+        match["categories"] = {"$in": [ObjectId(c) for c in filters["allowed_categories"]]}
 
     # ✅ Multiple varieties filter (OR)
-    if varieties:
-        query = query.filter(variety__in=varieties)
+    if variety and filters["varieties"]:
+        match["variety"] = {"$in": filters["varieties"]}
+
+    if price and filters["min_price"] is not None:
+        match["min_price"] = {"$gte": filters["min_price"]}
+
+    if price and filters["max_price"] is not None:
+        match["max_price"] = {"$lte": filters["max_price"]}
+
+    return match
+
+
+def total_cache_key(filters):
+    # ✅ Same filters => same cached total
+    return (
+        None if filters["allowed_categories"] is None else tuple(sorted(filters["allowed_categories"])),
+        tuple(sorted(filters["varieties"])),
+        filters["min_price"],
+        filters["max_price"],
+    )
+
+
+def parse_price_boundaries(raw):
+    if not raw:
+        return DEFAULT_PRICE_BUCKETS
+    boundaries = sorted({_price(b) for b in raw.split(",") if b.strip()})
+    if len(boundaries) < 2:
+        raise ValueError("price_buckets needs at least two boundaries")
+    return boundaries
+
 
-    # ✅ Backward compatibility (single variety)
-    elif variety:
-        query = query.filter(variety=variety)
+def catalog_facets_pipeline(filters, page, per_page, boundaries):
+    """Grid page + variety counts + price histogram as one $facet"""
+    base = catalog_match(filters, variety=False, price=False)
 
-    if min_price:
-        query = query.filter(min_price__gte=float(min_price))
+    # ✅ each facet ignores its own filter, so the sidebar shows the alternatives
+    variety_only = {k: v for k, v in catalog_match(filters, price=False).items() if k not in base}
+    price_only = {k: v for k, v in catalog_match(filters, variety=False).items() if k not in base}
+    selected = {**variety_only, **price_only}
 
-    if max_price:
-        query = query.filter(max_price__lte=float(max_price))
+    return [
+        {"$match": base},
+        {"$facet": {
+            "items": [
+                {"$match": selected},
+                {"$sort": {"last_edited_at": -1, "_id": -1}},
+                {"$skip": (page - 1) * per_page},
+                {"$limit": per_page},
+                {"$project": SAREE_JSON_PROJECTION}
+            ],
+            "total": [
+                {"$match": selected},
+                {"$count": "count"}
+            ],
+            "varieties": [
+                {"$match": price_only},
+                {"$group": {"_id": "$variety", "count": {"$sum": 1}}},
+                {"$sort": {"_id": 1}}
+            ],
+            "prices": [
+                {"$match": variety_only},
+                {"$bucket": {
+                    "groupBy": "$min_price",
+                    "boundaries": boundaries,
+                    "default": "other",
+                    "output": {"count": {"$sum": 1}}
+                }}
+            ]
+        }}
+    ]
 
-    total = query.count()
+
+def catalog_facets_body(result, page, per_page, boundaries):
+    # zero-fill so the histogram always has every bucket
+    bucket_counts = {row["_id"]: row["count"] for row in result["prices"]}
+    price_buckets = [
+        {"min": lo, "max": hi, "count": bucket_counts.get(lo, 0)}
+        for lo, hi in zip(boundaries, boundaries[1:])
+    ]
+    if bucket_counts.get("other"):
+        price_buckets.append({"min": None, "max": None, "count": bucket_counts["other"]})
+
+    return {
+        "page": page,
+        "per_page": per_page,
+        "total": result["total"][0]["count"] if result["total"] else 0,
+        "items": [saree_doc_to_json(doc) for doc in result["items"]],
+        "varieties": variety_count_rows(result["varieties"]),
+        "price_buckets": price_buckets
+    }
+
+
+def scoped_varieties_pipeline(allowed_categories):
+    # ✅ Token-scoped: group the category's published sarees server-side
+    return [
+        {"$match": {
+            "status": "published",
+            "categories": {"$in": [ObjectId(c) for c in allowed_categories]}
+        }},
+        {"$group": {"_id": "$variety", "count": {"$sum": 1}}},
+        {"$sort": {"_id": 1}}
+    ]
+
+
+def variety_count_rows(rows):
+    return [
+        {"name": row["_id"], "count": row["count"]}
+        for row in rows if row["_id"]
+    ]
+
+
+def unlisted_varieties_pipeline(known_names):
+    # published sarees whose variety has no Variety document (legacy data):
+    # the (status, variety) index bounds skip every known name, so this
+    # touches only those sarees
+    return [
+        {"$match": {"status": "published", "variety": {"$nin": known_names}}},
+        {"$group": {"_id": "$variety", "count": {"$sum": 1}}}
+    ]
+
+
+def merged_variety_rows(varieties, unlisted_rows):
+    """Maintained counts plus the unlisted names, by name"""
+    rows = [
+        {"name": v["name"], "count": v.get("published_saree_count", 0)}
+        for v in varieties if v.get("published_saree_count", 0) > 0
+    ]
+    rows += variety_count_rows(unlisted_rows)
+    return sorted(rows, key=lambda row: row["name"])
+
+
+def saree_etag(saree_id, last_edited_at):
+    # the CDN base is part of the payload, so it is part of the tag too
+    return content_etag(saree_id, last_edited_at.isoformat() if last_edited_at else "", CDN_BASE_URL)
+
+
+def _cached_total(query, key):
+    """query.count() memoised per catalog version, so scrolling doesn't recount"""
+    key = (get_catalog_version(),) + key
+    total = _total_cache.get(key)
+    if total is None:
+        total = query.count()
+        _total_cache.set(key, total)
+    return total
+
+
+@client_bp.route("/client/sarees", methods=["GET", "OPTIONS"])
+@catalog_cache.cached("client_sarees", version_etag=True)
+def list_sarees():
+    # Pagination
+    # ✅ ?cursor= (empty for the first page) switches to keyset mode
+    cursor = request.args.get("cursor")
+    try:
+        page, per_page = parse_paging(request.args)
+    except ValueError:
+        return jsonify({"message": "page and per_page must be integers"}), 400
+
+    try:
+        filters = parse_catalog_filters(request.args, _allowed_categories())
+    except ValueError:
+        return jsonify({"message": "min_price and max_price must be numbers"}), 400
+    match = catalog_match(filters)
+    total_key = total_cache_key(filters)
+
+    if cursor is not None:
+        if cursor:
+            try:
+                # ✅ seek straight past the previous page via the compound index
+                match.update(after_cursor(cursor))
+            except ValueError:
+                return jsonify({"message": "Invalid cursor"}), 400
+
+        query = Saree.objects(__raw__=match)
+
+        # one extra row tells us whether another page exists
+        sarees = list(
+            query
+            .only(*SAREE_JSON_FIELDS)
+            .order_by("-last_edited_at", "-id")
+            .limit(per_page + 1)
+            .as_pymongo()
+        )
+        has_more = len(sarees) > per_page
+        sarees = sarees[:per_page]
+
+        response = {
+            "per_page": per_page,
+            "next_cursor": encode_cursor(sarees[-1].get("last_edited_at"), sarees[-1]["_id"]) if has_more else None,
+            "items": [saree_doc_to_json(s) for s in sarees]
+        }
+        if request.args.get("include_total", "").lower() in ("1", "true"):
+            # count the whole filtered catalog, not just what is left after the cursor
+            response["total"] = _cached_total(Saree.objects(__raw__=catalog_match(filters)), total_key)
+
+        return jsonify(response), 200
+
+    query = Saree.objects(__raw__=match)
+    total = _cached_total(query, total_key)
 
     sarees = (
         query
+        .only(*SAREE_JSON_FIELDS)
         .skip((page - 1) * per_page)
         .limit(per_page)
-        .order_by("-last_edited_at")
+        .order_by("-last_edited_at", "-id")
+        .as_pymongo()
     )
 
     return jsonify({
         "page": page,
         "per_page": per_page,
         "total": total,
-        "items": [s.to_json() for s in sarees]
+        "items": [saree_doc_to_json(s) for s in sarees]
     }), 200
 
 
+@client_bp.route("/client/catalog", methods=["GET", "OPTIONS"])
+@catalog_cache.cached("client_catalog", version_etag=True)
+def catalog_facets():
+    """Grid page + variety counts + price histogram in one $facet round trip"""
+    try:
+        page, per_page = parse_paging(request.args)
+    except ValueError:
+        return jsonify({"message": "page and per_page must be integers"}), 400
+
+    try:
+        boundaries = parse_price_boundaries(request.args.get("price_buckets"))
+    except ValueError:
+        return jsonify({"message": "Invalid price_buckets"}), 400
+
+    try:
+        filters = parse_catalog_filters(request.args, _allowed_categories())
+    except ValueError:
+        return jsonify({"message": "min_price and max_price must be numbers"}), 400
+    result = Saree._get_collection().aggregate(
+        catalog_facets_pipeline(filters, page, per_page, boundaries)
+    ).next()
+
+    return jsonify(catalog_facets_body(result, page, per_page, boundaries)), 200
+
+
 @client_bp.route("/client/varieties", methods=["GET", "OPTIONS"])
+@catalog_cache.cached("client_varieties", version_etag=True)
 def list_varieties():
-    # ✅ Optional token for category filtering
-    token = request.args.get("token")
-    allowed_categories = get_allowed_categories(token)
-    
-    # Query sarees based on category filter
-    saree_query = Saree.objects(status="published")
-    
-    if allowed_categories:
-        saree_query = saree_query.filter(category__in=allowed_categories)
+    allowed_categories = _allowed_categories()
     
-    # Get unique varieties from filtered sarees
-    sarees = saree_query.only("variety")
-    unique_varieties = set()
-    for saree in sarees:
-        if saree.variety:
-            unique_varieties.add(saree.variety)
-    
-    # Return varieties
-    return jsonify([{"name": v} for v in sorted(unique_varieties)]), 200
+    if allowed_categories is not None:
+        rows = Saree._get_collection().aggregate(scoped_varieties_pipeline(allowed_categories))
+        return jsonify(variety_count_rows(rows)), 200
+
+    # ✅ Whole catalog: read the maintained per-variety counts
+    varieties = list(Variety._get_collection().find({}, {"name": 1, "published_saree_count": 1}))
+    unlisted = Saree._get_collection().aggregate(
+        unlisted_varieties_pipeline([v["name"] for v in varieties])
+    )
+    return jsonify(merged_variety_rows(varieties, unlisted)), 200
 
 
 @client_bp.route("/client/sarees/<string:saree_id>", methods=["GET", "OPTIONS"])
+@catalog_cache.cached("client_saree_detail")
 def get_saree_by_id(saree_id):
+    # ✅ revalidation only needs last_edited_at, not the whole document
+    if request.if_none_match:
+        try:
+            current = Saree.objects(id=saree_id, status="published").only("last_edited_at").first()
+        except ValidationError:
+            current = None
+
+        if current:
+            etag = saree_etag(saree_id, current.last_edited_at)
+            if request.if_none_match.contains(etag):
+                return not_modified(etag)
+
     try:
         saree = Saree.objects.get(id=saree_id, status="published")
     except (DoesNotExist, ValidationError):
         return jsonify({"message": "Saree not found"}), 404
 
-    return jsonify(saree.to_json()), 200
+    response = jsonify(saree.to_json())
+    response.set_etag(saree_etag(saree_id, saree.last_edited_at))
+    return response, 200
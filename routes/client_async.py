@@ -0,0 +1,225 @@
+"""
+Async read path for the public catalog.
+
+The same /client/* read endpoints and JSON as routes/client.py, served
+as Starlette routes on pymongo's AsyncMongoClient, so a request waiting
+on Mongo doesn't hold a worker thread. Queries and response bodies come
+from the request-free builders in routes/client.py; only the I/O lives
+here. asgi.py serves these routes, optionally with the Flask app mounted
+behind them.
+
+Not carried over: the in-process response cache and the key-based list
+ETags (catalog_cache.cached). Totals are still memoised per catalog
+version and saree detail still answers If-None-Match.
+"""
+import os
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from db import get_async_db
+from models.saree import SAREE_JSON_PROJECTION, saree_doc_to_json
+from routes.client import (
+    _total_cache,
+    after_cursor,
+    catalog_facets_body,
+    catalog_facets_pipeline,
+    catalog_match,
+    encode_cursor,
+    parse_catalog_filters,
+    parse_paging,
+    parse_price_boundaries,
+    saree_etag,
+    scoped_varieties_pipeline,
+    total_cache_key,
+    merged_variety_rows,
+    unlisted_varieties_pipeline,
+    variety_count_rows,
+)
+from utils.catalog_cache import get_catalog_version_async
+from utils.client_session import is_revoked_async, load_session
+
+# same fallback as create_app()
+SESSION_SECRET = os.getenv("CLIENT_SESSION_SECRET") or os.getenv("JWT_SECRET_KEY")
+
+
+def _message(message, status):
+    return JSONResponse({"message": message}, status_code=status)
+
+
+async def _allowed_categories(request):
+    """(category ids or None, error response or None), the async
+    counterpart of load_client_session + _allowed_categories"""
+    db = get_async_db()
+
+    value = request.headers.get("X-Client-Session") or request.query_params.get("session")
+    if value:
+        payload = load_session(value, SESSION_SECRET)
+        if payload is None:
+            return None, _message("Invalid or expired session", 401)
+        if await is_revoked_async(payload["t"], db.category_invite_tokens):
+            return None, _message("Session revoked", 401)
+        return payload["c"], None
+
+    # ✅ legacy ?token=, one query per request
+    token = request.query_params.get("token")
+    if not token:
+        return None, None
+    category_ids = await db.category_invite_tokens.distinct(
+        "category", {"token": token, "is_active": True}
+    )
+    return ([str(c) for c in category_ids] or None), None
+
+
+async def _cached_total(match, key):
+    key = (await get_catalog_version_async(get_async_db().counters),) + key
+    total = _total_cache.get(key)
+    if total is None:
+        total = await get_async_db().sarees.count_documents(match)
+        _total_cache.set(key, total)
+    return total
+
+
+def _etag_matches(if_none_match, etag):
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or any(
+        c.removeprefix("W/").strip('"') == etag for c in candidates
+    )
+
+
+async def list_sarees(request):
+    args = request.query_params
+    cursor = args.get("cursor")
+    try:
+        page, per_page = parse_paging(args)
+    except ValueError:
+        return _message("page and per_page must be integers", 400)
+
+    allowed_categories, error = await _allowed_categories(request)
+    if error:
+        return error
+
+    try:
+        filters = parse_catalog_filters(args, allowed_categories)
+    except ValueError:
+        return _message("min_price and max_price must be numbers", 400)
+    match = catalog_match(filters)
+    total_key = total_cache_key(filters)
+    sarees = get_async_db().sarees
+
+    if cursor is not None:
+        page_match = dict(match)
+        if cursor:
+            try:
+                page_match.update(after_cursor(cursor))
+            except ValueError:
+                return _message("Invalid cursor", 400)
+
+        docs = await sarees.find(page_match, SAREE_JSON_PROJECTION).sort(
+            [("last_edited_at", -1), ("_id", -1)]
+        ).limit(per_page + 1).to_list()
+        has_more = len(docs) > per_page
+        docs = docs[:per_page]
+
+        response = {
+            "per_page": per_page,
+            "next_cursor": encode_cursor(docs[-1].get("last_edited_at"), docs[-1]["_id"]) if has_more else None,
+            "items": [saree_doc_to_json(doc) for doc in docs]
+        }
+        if args.get("include_total", "").lower() in ("1", "true"):
+            response["total"] = await _cached_total(match, total_key)
+
+        return JSONResponse(response)
+
+    total = await _cached_total(match, total_key)
+    docs = await sarees.find(match, SAREE_JSON_PROJECTION).sort(
+        [("last_edited_at", -1), ("_id", -1)]
+    ).skip((page - 1) * per_page).limit(per_page).to_list()
+
+    return JSONResponse({
+        "page": page,
+        "per_page": per_page,
+        "total": total,
+        "items": [saree_doc_to_json(doc) for doc in docs]
+    })
+
+
+async def catalog_facets(request):
+    args = request.query_params
+    try:
+        page, per_page = parse_paging(args)
+    except ValueError:
+        return _message("page and per_page must be integers", 400)
+
+    try:
+        boundaries = parse_price_boundaries(args.get("price_buckets"))
+    except ValueError:
+        return _message("Invalid price_buckets", 400)
+
+    allowed_categories, error = await _allowed_categories(request)
+    if error:
+        return error
+
+    try:
+        filters = parse_catalog_filters(args, allowed_categories)
+    except ValueError:
+        return _message("min_price and max_price must be numbers", 400)
+    cursor = await get_async_db().sarees.aggregate(
+        catalog_facets_pipeline(filters, page, per_page, boundaries)
+    )
+    result = await cursor.next()
+
+    return JSONResponse(catalog_facets_body(result, page, per_page, boundaries))
+
+
+async def list_varieties(request):
+    allowed_categories, error = await _allowed_categories(request)
+    if error:
+        return error
+
+    db = get_async_db()
+    if allowed_categories is not None:
+        cursor = await db.sarees.aggregate(scoped_varieties_pipeline(allowed_categories))
+        return JSONResponse(variety_count_rows(await cursor.to_list()))
+
+    varieties = await db.varieties.find({}, {"name": 1, "published_saree_count": 1}).to_list()
+    cursor = await db.sarees.aggregate(unlisted_varieties_pipeline([v["name"] for v in varieties]))
+    return JSONResponse(merged_variety_rows(varieties, await cursor.to_list()))
+
+
+async def get_saree_by_id(request):
+    saree_id = request.path_params["saree_id"]
+    try:
+        query = {"_id": ObjectId(saree_id), "status": "published"}
+    except InvalidId:
+        return _message("Saree not found", 404)
+
+    sarees = get_async_db().sarees
+
+    # ✅ revalidation only needs last_edited_at, not the whole document
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        current = await sarees.find_one(query, {"last_edited_at": 1})
+        if current:
+            etag = saree_etag(saree_id, current.get("last_edited_at"))
+            if _etag_matches(if_none_match, etag):
+                return Response(status_code=304, headers={"ETag": f'"{etag}"'})
+
+    doc = await sarees.find_one(query, SAREE_JSON_PROJECTION)
+    if doc is None:
+        return _message("Saree not found", 404)
+
+    return JSONResponse(
+        saree_doc_to_json(doc),
+        headers={"ETag": f'"{saree_etag(saree_id, doc.get("last_edited_at"))}"'}
+    )
+
+
+routes = [
+    Route("/client/sarees", list_sarees, methods=["GET"]),
+    Route("/client/catalog", catalog_facets, methods=["GET"]),
+    Route("/client/varieties", list_varieties, methods=["GET"]),
+    Route("/client/sarees/{saree_id}", get_saree_by_id, methods=["GET"]),
+]
@@ -1,23 +1,90 @@
-from flask import Blueprint, jsonify
+import os
+
+from flask import Blueprint, Response, jsonify, request
 from flask_jwt_extended import jwt_required
 from models.category import Category
+from models.dashboard_stats import get_dashboard_stats, refresh_dashboard_stats
 from models.saree import Saree
 from models.variety import Variety
+from utils.catalog_cache import catalog_cache
+from utils import metrics
 
 dashboard_bp = Blueprint("dashboard", __name__)
 
+# materialized (default) | estimated (collection metadata) | exact (recount now)
+STATS_SOURCE = os.getenv("DASHBOARD_STATS_SOURCE", "materialized")
+STATS_SOURCES = ("materialized", "estimated", "exact")
+
+
 @dashboard_bp.route(
     "/admin/dashboard/stats",
     methods=["GET", "OPTIONS"]
 )
 @jwt_required()
 def dashboard_stats():
-    category_count = Category.objects.count()
-    saree_count = Saree.objects.count()
-    variety_count = Variety.objects.count()
+    source = request.args.get("source", STATS_SOURCE)
+    if source not in STATS_SOURCES:
+        return jsonify({"message": "Invalid source. Allowed: materialized, estimated, exact"}), 400
+
+    # ✅ metadata counts: no breakdowns, but free on any collection size
+    if source == "estimated":
+        return jsonify({
+            "categories": Category._get_collection().estimated_document_count(),
+            "sarees": Saree._get_collection().estimated_document_count(),
+            "varieties": Variety._get_collection().estimated_document_count(),
+            "source": source
+        }), 200
+
+    # ✅ one read of the stats document the write paths keep current
+    stats = refresh_dashboard_stats() if source == "exact" else get_dashboard_stats()
+
+    return jsonify({
+        "categories": stats["categories"],
+        "sarees": stats["sarees_published"] + stats["sarees_unpublished"],
+        "varieties": stats["varieties"],
+        "sarees_published": stats["sarees_published"],
+        "sarees_unpublished": stats["sarees_unpublished"],
+        "active_invites": stats["active_invites"],
+        "active_category_invites": stats["active_category_invites"],
+        "by_variety": [
+            {"name": v["name"], "total": v["total"], "published": v["published"]}
+            for v in sorted(stats.get("by_variety", []), key=lambda v: v["name"])
+        ],
+        "refreshed_at": stats["refreshed_at"].replace(tzinfo=None).isoformat() if stats.get("refreshed_at") else None,
+        "source": source
+    }), 200
+
+
+@dashboard_bp.route("/admin/cache/stats", methods=["GET"])
+@jwt_required()
+def cache_stats():
+    return jsonify({"catalog": catalog_cache.stats()}), 200
+
+
+@dashboard_bp.route("/admin/metrics", methods=["GET"])
+@jwt_required()
+def metrics_text():
+    """Prometheus text format, for this worker process"""
+    if not metrics.METRICS_ENABLED:
+        return jsonify({"message": "Metrics are disabled (METRICS_ENABLED)"}), 404
+
+    cache = catalog_cache.stats()
+    body = metrics.render_prometheus({
+        "catalog_cache_hits": ("Catalog response cache hits", cache["hits"]),
+        "catalog_cache_misses": ("Catalog response cache misses", cache["misses"]),
+        "catalog_cache_entries": ("Catalog response cache entries", cache["entries"]),
+        "catalog_version": ("Catalog version stamp seen by this worker", cache["version"] or 0),
+    })
+    return Response(body, mimetype="text/plain; version=0.0.4")
+
+
+@dashboard_bp.route("/admin/metrics/slow-queries", methods=["GET"])
+@jwt_required()
+def slow_queries():
+    if not metrics.METRICS_ENABLED:
+        return jsonify({"message": "Metrics are disabled (METRICS_ENABLED)"}), 404
 
     return jsonify({
-        "categories": category_count,
-        "sarees": saree_count,
-        "varieties": variety_count
+        "threshold_ms": metrics.SLOW_QUERY_MS,
+        "items": metrics.slow_queries()
     }), 200
@@ -0,0 +1,23 @@
+from flask import Blueprint, jsonify
+from pymongo.errors import PyMongoError
+from mongoengine.connection import ConnectionFailure
+
+from db import ping_db
+
+health_bp = Blueprint("health", __name__)
+
+
+@health_bp.route("/healthz", methods=["GET"])
+def liveness():
+    return jsonify({"status": "ok"}), 200
+
+
+@health_bp.route("/readyz", methods=["GET"])
+def readiness():
+    # ✅ ready only once this worker can reach Mongo
+    try:
+        ping_db()
+    except (PyMongoError, ConnectionFailure) as e:
+        return jsonify({"status": "unavailable", "error": str(e)}), 503
+
+    return jsonify({"status": "ready"}), 200
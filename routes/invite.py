@@ -3,9 +3,13 @@ import secrets
 import os
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
-from models.invite_token import InviteToken, CategoryInviteToken
+from models.invite_token import InviteToken, CategoryInviteToken, lock_to_device, valid_device_id, valid_token
 from models.category import Category
 from mongoengine.errors import DoesNotExist, ValidationError
+from utils.catalog_cache import bump_catalog_version
+from models.dashboard_stats import record_counts
+from utils import invite_cache
+from utils.client_session import issue_session, mark_revoked, SESSION_MAX_AGE_SECONDS
 
 invite_bp = Blueprint("invite_bp", __name__)
 
@@ -19,6 +23,7 @@ def create_invite():
         token=token,
         is_active=True
     ).save()
+    record_counts(active_invites=1)
 
     frontend_url = os.getenv("FRONTEND_URL", "http://localhost:5173")
 
@@ -36,25 +41,38 @@ def verify_invite():
 
     if not token or not device_id:
         return jsonify({"allowed": False, "msg": "token and device_id required"}), 400
-
-    invite = InviteToken.objects(token=token, is_active=True).first()
-    if not invite:
-        return jsonify({"allowed": False, "msg": "Invalid / Expired link"}), 403
-
-    # ✅ first time use => lock to device
-    if not invite.locked_device_id:
-        invite.locked_device_id = device_id
-        invite.save()
+    if not valid_token(token):
+        return jsonify({"allowed": False, "msg": "Invalid token"}), 400
+    if not valid_device_id(device_id):
+        return jsonify({"allowed": False, "msg": "Invalid device_id"}), 400
+
+    cached = invite_cache.get("invite", token, device_id)
+    if cached:
+        return jsonify(cached[0]), cached[1]
+
+    # ✅ validate + lock-on-first-use in a single atomic update
+    before = lock_to_device(InviteToken, {"token": token}, device_id)
+    if not before:
+        body, status = {"allowed": False, "msg": "Invalid / Expired link"}, 403
+
+    # ✅ first time use => locked to device
+    elif not before.get("locked_device_id"):
+        invite_cache.put("invite", token, device_id,
+                         body={"allowed": True, "msg": "Access allowed"}, status=200)
         return jsonify({"allowed": True, "msg": "Link locked to this device"}), 200
 
     # ✅ already locked => allow only same device
-    if invite.locked_device_id != device_id:
-        return jsonify({
+    elif before["locked_device_id"] != device_id:
+        body, status = {
             "allowed": False,
             "msg": "This link is already used on another device"
-        }), 403
+        }, 403
 
-    return jsonify({"allowed": True, "msg": "Access allowed"}), 200
+    else:
+        body, status = {"allowed": True, "msg": "Access allowed"}, 200
+
+    invite_cache.put("invite", token, device_id, body=body, status=status)
+    return jsonify(body), status
 
 
 @invite_bp.route("/api/invite/disable", methods=["POST"])
@@ -64,13 +82,16 @@ def disable_invite():
 
     if not token:
         return jsonify({"msg": "token required"}), 400
+    if not valid_token(token):
+        return jsonify({"msg": "Invalid token"}), 400
 
-    invite = InviteToken.objects(token=token).first()
-    if not invite:
+    # only an active token changes the dashboard count; disabling twice is still fine
+    if InviteToken.objects(token=token, is_active=True).update_one(set__is_active=False):
+        record_counts(active_invites=-1)
+    elif not InviteToken.objects(token=token).only("id").first():
         return jsonify({"msg": "Token not found"}), 404
 
-    invite.is_active = False
-    invite.save()
+    invite_cache.invalidate_token(token)
 
     return jsonify({"msg": "Token disabled"}), 200
 
@@ -85,27 +106,37 @@ def create_category_invite():
 
     if not category_ids:
         return jsonify({"msg": "category_ids required"}), 400
+    if not isinstance(category_ids, list) or not all(isinstance(c, str) for c in category_ids):
+        return jsonify({"msg": "category_ids must be a list of ids"}), 400
 
     # Validate all categories exist
-    categories = Category.objects(id__in=category_ids)
+    categories = list(Category.objects(id__in=category_ids).only("name"))
     if len(categories) != len(category_ids):
         return jsonify({"msg": "One or more categories not found"}), 404
 
     token = secrets.token_urlsafe(16)
     frontend_url = os.getenv("FRONTEND_URL", "http://localhost:5173")
 
-    # Create invite tokens for each category
-    created_invites = []
-    for category in categories:
+    # ✅ Create invite tokens for every category in one insert_many
+    CategoryInviteToken.objects.insert([
         CategoryInviteToken(
             token=token,
             category=category,
             is_active=True
-        ).save()
-        created_invites.append({
+        )
+        for category in categories
+    ], load_bulk=False)
+    record_counts(active_category_invites=1)
+    # responses cached for ?token= before it existed were unscoped
+    bump_catalog_version()
+
+    created_invites = [
+        {
             "category_id": str(category.id),
             "category_name": category.name
-        })
+        }
+        for category in categories
+    ]
 
     return jsonify({
         "token": token,
@@ -122,35 +153,58 @@ def verify_category_invite():
 
     if not token or not device_id:
         return jsonify({"allowed": False, "msg": "token and device_id required"}), 400
-
-    # Get all category invites for this token
-    invites = CategoryInviteToken.objects(token=token, is_active=True)
-    if not invites:
-        return jsonify({"allowed": False, "msg": "Invalid / Expired link"}), 403
-
-    # First time use => lock to device
-    if not invites[0].locked_device_id:
-        for invite in invites:
-            invite.locked_device_id = device_id
-            invite.save()
-        return jsonify({
+    if not valid_token(token):
+        return jsonify({"allowed": False, "msg": "Invalid token"}), 400
+    if not valid_device_id(device_id):
+        return jsonify({"allowed": False, "msg": "Invalid device_id"}), 400
+
+    cached = invite_cache.get("category_invite", token, device_id)
+    if cached:
+        return jsonify(cached[0]), cached[1]
+
+    def allowed_body(msg):
+        # ✅ signed session so /client/* can skip the invite lookups
+        category_ids = CategoryInviteToken._get_collection().distinct(
+            "category", {"token": token, "is_active": True}
+        )
+        return {
             "allowed": True,
-            "msg": "Link locked to this device",
-            "token": token
-        }), 200
+            "msg": msg,
+            "token": token,
+            "session": issue_session(token, device_id, category_ids),
+            "session_expires_in": SESSION_MAX_AGE_SECONDS
+        }
+
+    # The token's first invite (lowest _id) is the lock holder: the
+    # conditional update on it decides the race between two devices
+    before = lock_to_device(CategoryInviteToken, {"token": token}, device_id)
+    if not before:
+        body, status = {"allowed": False, "msg": "Invalid / Expired link"}, 403
+
+    # First time use => lock the token's remaining invites too (one update_many)
+    elif not before.get("locked_device_id"):
+        CategoryInviteToken.objects(
+            token=token,
+            is_active=True,
+            locked_device_id__in=[None, ""]
+        ).update(set__locked_device_id=device_id)
+        body = allowed_body("Link locked to this device")
+        invite_cache.put("category_invite", token, device_id,
+                         body={**body, "msg": "Access allowed"}, status=200)
+        return jsonify(body), 200
 
     # Already locked => allow only same device
-    if invites[0].locked_device_id != device_id:
-        return jsonify({
+    elif before["locked_device_id"] != device_id:
+        body, status = {
             "allowed": False,
             "msg": "This link is already used on another device"
-        }), 403
+        }, 403
 
-    return jsonify({
-        "allowed": True,
-        "msg": "Access allowed",
-        "token": token
-    }), 200
+    else:
+        body, status = allowed_body("Access allowed"), 200
+
+    invite_cache.put("category_invite", token, device_id, body=body, status=status)
+    return jsonify(body), status
 
 
 @invite_bp.route("/api/invite/category/disable", methods=["POST"])
@@ -160,13 +214,18 @@ def disable_category_invite():
 
     if not token:
         return jsonify({"msg": "token required"}), 400
+    if not valid_token(token):
+        return jsonify({"msg": "Invalid token"}), 400
 
-    invites = CategoryInviteToken.objects(token=token)
-    if not invites:
+    # ✅ every category of the token in one update_many
+    if CategoryInviteToken.objects(token=token, is_active=True).update(set__is_active=False):
+        record_counts(active_category_invites=-1)
+    elif not CategoryInviteToken.objects(token=token).only("id").first():
         return jsonify({"msg": "Token not found"}), 404
 
-    for invite in invites:
-        invite.is_active = False
-        invite.save()
+    invite_cache.invalidate_token(token)
+    mark_revoked(token)
 
+    # token-scoped catalog responses are cached per token
+    bump_catalog_version()
     return jsonify({"msg": "Token disabled"}), 200
@@ -1,7 +1,15 @@
 from flask import Blueprint, request, jsonify
-from models.saree import Saree
-from models.variety import Variety
+from flask_jwt_extended import jwt_required
+from models.saree import Saree, SAREE_JSON_FIELDS, saree_doc_to_json
+from utils.search import SEARCH_MODES, search_match
+from utils.saree_import import SareeImporter, iter_csv_records, iter_ndjson_records
+from models.variety import Variety, apply_count_deltas
+from models.category import detach_saree
+from models.dashboard_stats import record_saree_deltas
 from mongoengine.queryset.visitor import Q
+from bson import ObjectId
+from bson.errors import InvalidId
+from utils.catalog_cache import bump_catalog_version
 
 saree_bp = Blueprint("saree", __name__)
 
@@ -16,9 +24,17 @@ def add_saree():
     if data.get("min_price") is None or data.get("max_price") is None:
         return jsonify({"message": "min_price and max_price are mandatory"}), 400
 
-    variety = Variety.objects(name=data["variety"]).first()
-    if not variety:
+    status = data.get("status", "unpublished")
+    published = 1 if status == "published" else 0
+
+    # ✅ atomic count bump doubles as the variety existence check
+    if not Variety.objects(name=data["variety"]).update_one(
+        inc__total_saree_count=1,
+        inc__published_saree_count=published
+    ):
         return jsonify({"message": "Variety not found"}), 400
+    # counted now, so the rollback's apply_count_deltas cancels it
+    record_saree_deltas({data["variety"]: (1, published)})
 
     saree = Saree(
         # name=data.get("name"),
@@ -27,16 +43,41 @@ def add_saree():
         remarks=data.get("remarks"),
         min_price=data["min_price"],
         max_price=data["max_price"],
-        status=data.get("status", "unpublished")
+        status=status
     )
-    saree.save()
-
-    variety.total_saree_count += 1
-    variety.save()
+    try:
+        saree.save()
+    except Exception:
+        apply_count_deltas({data["variety"]: (-1, -published)})
+        raise
 
+    bump_catalog_version()
     return jsonify(saree.to_json()), 201
 
 
+@saree_bp.route("/sarees/import", methods=["POST"])
+@jwt_required()
+def import_sarees():
+    # ✅ text/csv (variety, min_price, max_price, image_url(s) columns) or NDJSON, one POST /saree body per line
+    if request.mimetype == "text/csv":
+        records = iter_csv_records(request.stream)
+    elif request.mimetype in ("application/x-ndjson", "application/jsonl"):
+        records = iter_ndjson_records(request.stream)
+    else:
+        return jsonify({"message": "Content-Type must be text/csv or application/x-ndjson"}), 415
+
+    importer = SareeImporter().run(records)
+
+    if importer.inserted:
+        bump_catalog_version()
+
+    return jsonify({
+        "inserted": importer.inserted,
+        "failed": len(importer.errors),
+        "errors": importer.errors
+    }), 200
+
+
 @saree_bp.route("/saree/<string:saree_id>", methods=["PUT"])
 def edit_saree(saree_id):
     data = request.json
@@ -45,20 +86,14 @@ def edit_saree(saree_id):
     if not saree:
         return jsonify({"message": "Saree not found"}), 404
 
+    old_variety_name = saree.variety
+    was_published = saree.status == "published"
+
     # variety change handling
     if "variety" in data and data["variety"] != saree.variety:
-        new_variety = Variety.objects(name=data["variety"]).first()
-        if not new_variety:
+        if not Variety.objects(name=data["variety"]).only("id").first():
             return jsonify({"message": "Variety not found"}), 400
 
-        old_variety = Variety.objects(name=saree.variety).first()
-        if old_variety:
-            old_variety.total_saree_count -= 1
-            old_variety.save()
-
-        new_variety.total_saree_count += 1
-        new_variety.save()
-
         saree.variety = data["variety"]
 
     # updates
@@ -70,21 +105,40 @@ def edit_saree(saree_id):
             setattr(saree, field, data[field])
 
     saree.save()
+
+    # ✅ move the counts from old to new variety / status in one bulk write
+    is_published = saree.status == "published"
+    if (old_variety_name, was_published) != (saree.variety, is_published):
+        deltas = {old_variety_name: (-1, -int(was_published))}
+        total, published = deltas.get(saree.variety, (0, 0))
+        deltas[saree.variety] = (total + 1, published + int(is_published))
+        apply_count_deltas(deltas)
+
+    bump_catalog_version()
     return jsonify(saree.to_json()), 200
 
 
 @saree_bp.route("/saree/<string:saree_id>", methods=["DELETE"])
 def delete_saree(saree_id):
-    saree = Saree.objects(id=saree_id).first()
-    if not saree:
+    try:
+        object_id = ObjectId(saree_id)
+    except (InvalidId, TypeError):
         return jsonify({"message": "Saree not found"}), 404
 
-    variety = Variety.objects(name=saree.variety).first()
-    if variety:
-        variety.total_saree_count -= 1
-        variety.save()
+    # find_one_and_delete: only the request that actually removed the document
+    # gets it back, so a concurrent delete of the same saree decrements once
+    saree = Saree._get_collection().find_one_and_delete(
+        {"_id": object_id}, projection={"variety": 1, "status": 1}
+    )
+    if not saree:
+        return jsonify({"message": "Saree not found"}), 404
 
-    saree.delete()
+    detach_saree(object_id)
+    status = saree.get("status", "published")
+    apply_count_deltas({
+        saree.get("variety"): (-1, -1 if status == "published" else 0)
+    })
+    bump_catalog_version()
     return jsonify({"message": "Saree deleted"}), 200
 
 
@@ -92,25 +146,33 @@ def delete_saree(saree_id):
 def list_sarees():
     variety = request.args.get("variety")
     search = request.args.get("search")
+    # ✅ prefix (indexed, default) | text (relevance ordered) | substring (old regex)
+    search_mode = request.args.get("search_mode", "prefix")
     page = int(request.args.get("page", 1))
     per_page = int(request.args.get("per_page", 10))
 
+    if search_mode not in SEARCH_MODES:
+        return jsonify({"message": "Invalid search_mode. Allowed: prefix, text, substring"}), 400
+
     query = Q()
 
     if variety:
         query &= Q(variety=variety)
 
-    if search:
-        query &= Q(name__icontains=search)
-
-    qs = Saree.objects(query).order_by("name")
+    if search and search_mode == "text":
+        qs = Saree.objects(query).search_text(search).order_by("$text_score")
+    else:
+        if search:
+            query &= Q(__raw__=search_match(search, search_mode))
+        qs = Saree.objects(query).order_by("name")
 
     total = qs.count()
-    sarees = qs.skip((page - 1) * per_page).limit(per_page)
+    # ✅ projected raw documents, no Document construction per row
+    sarees = qs.only(*SAREE_JSON_FIELDS).skip((page - 1) * per_page).limit(per_page).as_pymongo()
 
     return jsonify({
         "total": total,
         "page": page,
         "per_page": per_page,
-        "data": [s.to_json() for s in sarees]
+        "data": [saree_doc_to_json(s) for s in sarees]
     }), 200
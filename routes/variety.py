@@ -1,10 +1,13 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models.variety import Variety, AdminMeta
-from models.admin_user import AdminUser
+from flask_jwt_extended import jwt_required
+from models.variety import Variety, AdminMeta, reconcile_variety_counts
+from utils.admin_identity import current_admin
 from datetime import datetime
 import pytz
-from models.saree import Saree
+from models.saree import Saree, refresh_search_tokens
+from utils.search import SEARCH_MODES, search_match
+from utils.catalog_cache import bump_catalog_version
+from models.dashboard_stats import record_variety_added, record_variety_renamed, refresh_dashboard_stats
 
 
 IST = pytz.timezone("Asia/Kolkata")
@@ -17,7 +20,9 @@ def add_variety():
     data = request.json
     name = data.get("name")
 
-    admin = AdminUser.objects(id=get_jwt_identity()).first()
+    admin = current_admin()
+    if not admin:
+        return jsonify({"message": "Invalid admin"}), 401
 
     variety = Variety(
         name=name,
@@ -28,6 +33,8 @@ def add_variety():
         )
     )
     variety.save()
+    record_variety_added(variety.name)
+    bump_catalog_version()
 
     return jsonify({"message": "Variety added"}), 201
 
@@ -37,18 +44,26 @@ def edit_variety(variety_id):
     data = request.json
     name = data.get("name")
 
-    admin = AdminUser.objects(id=get_jwt_identity()).first()
+    admin = current_admin()
+    if not admin:
+        return jsonify({"message": "Invalid admin"}), 401
+
     variety = Variety.objects(id=variety_id).first()
     if not variety:
         return jsonify({"message": "Variety not found"}), 404
 
+    old_name = variety.name
     variety.name = name
     variety.admin.username = admin.username
     variety.admin.full_name = admin.full_name
     variety.admin.last_edited_date = datetime.now(IST)
 
     variety.save()
-    Saree.objects(variety=variety.name).update(set__variety=name)
+    record_variety_renamed(old_name, name)
+    Saree.objects(variety=old_name).update(set__variety=name)
+    # the bulk rename bypasses Saree.save(), so re-tokenize those sarees
+    refresh_search_tokens({"variety": name})
+    bump_catalog_version()
 
 
     return jsonify({"message": "Variety updated"}), 200
@@ -58,24 +73,39 @@ def edit_variety(variety_id):
 @jwt_required()
 def list_varieties():
     search = request.args.get("search", "")
+    search_mode = request.args.get("search_mode", "prefix")
     page = int(request.args.get("page", 1))
     per_page = int(request.args.get("per_page", 10))
     sort_by = request.args.get("sort_by", "name")  # name | total_saree_count
     order = request.args.get("order", "asc")       # asc | desc
 
-    query = Variety.objects(name__icontains=search)
+    if search_mode not in SEARCH_MODES:
+        return jsonify({"message": "Invalid search_mode. Allowed: prefix, text, substring"}), 400
+
+    # varieties have no text index; "text" behaves like "prefix"
+    if search_mode == "text":
+        search_mode = "prefix"
+
+    query = Variety.objects(__raw__=search_match(search, search_mode) if search else {})
 
     sort_field = sort_by if order == "asc" else f"-{sort_by}"
     query = query.order_by(sort_field)
 
     total = query.count()
-    varieties = query.skip((page - 1) * per_page).limit(per_page)
+    varieties = (
+        query
+        .only("name", "total_saree_count")
+        .skip((page - 1) * per_page)
+        .limit(per_page)
+        .as_pymongo()
+    )
 
     data = [
         {
-            "id": str(v.id),
-            "name": v.name,
-            "total_saree_count": v.total_saree_count
+            "id": str(v["_id"]),
+            "name": v["name"],
+            # IntField default for documents written before the counter existed
+            "total_saree_count": v.get("total_saree_count", 0)
         }
         for v in varieties
     ]
@@ -86,3 +116,18 @@ def list_varieties():
         "per_page": per_page,
         "data": data
     }), 200
+
+
+@variety_bp.route("/admin/varieties/reconcile", methods=["POST"])
+@jwt_required()
+def reconcile_varieties():
+    repaired = reconcile_variety_counts()
+    if repaired:
+        bump_catalog_version()
+    # the dashboard's by_variety breakdown drifts the same way
+    refresh_dashboard_stats()
+
+    return jsonify({
+        "message": "Variety counts reconciled",
+        "repaired": repaired
+    }), 200
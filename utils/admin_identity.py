@@ -0,0 +1,55 @@
+"""
+Admin identity from JWT claims.
+
+admin_login embeds username / full_name in the access token, so write
+paths can fill AdminMeta without an AdminUser lookup. Whether the
+account still exists is checked at most once per
+ADMIN_REVOCATION_CHECK_SECONDS per worker (0 disables the check).
+"""
+import os
+from collections import namedtuple
+
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from mongoengine.errors import ValidationError
+
+from models.admin_user import AdminUser
+from utils.cache import MemoryBackend
+
+REVOCATION_CHECK_SECONDS = int(os.getenv("ADMIN_REVOCATION_CHECK_SECONDS", 60))
+
+CurrentAdmin = namedtuple("CurrentAdmin", ["id", "username", "full_name"])
+
+_existing_admins = MemoryBackend(maxsize=256, ttl=REVOCATION_CHECK_SECONDS)
+
+
+def admin_claims(admin):
+    return {"username": admin.username, "full_name": admin.full_name}
+
+
+def _lookup(admin_id):
+    try:
+        return AdminUser.objects(id=admin_id).only("username", "full_name").first()
+    except ValidationError:
+        return None
+
+
+def current_admin():
+    """CurrentAdmin for the request's JWT, or None if the account is gone"""
+    admin_id = get_jwt_identity()
+    claims = get_jwt()
+
+    # tokens issued before the claims existed
+    if "username" not in claims:
+        admin = _lookup(admin_id)
+        return CurrentAdmin(admin_id, admin.username, admin.full_name) if admin else None
+
+    if REVOCATION_CHECK_SECONDS and not _existing_admins.get(admin_id):
+        if not _lookup(admin_id):
+            return None
+        _existing_admins.set(admin_id, True)
+
+    return CurrentAdmin(admin_id, claims["username"], claims["full_name"])
+
+
+def forget_admin(admin_id):
+    _existing_admins.delete(admin_id)
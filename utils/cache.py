@@ -0,0 +1,64 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheBackend:
+    """Minimal interface a response cache store has to provide.
+
+    Swap MemoryBackend for a shared store (Redis, memcached, ...) by
+    implementing these four methods.
+    """
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """In-process LRU with a per-entry TTL, safe across request threads"""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,185 @@
+"""
+Response cache for the public /client catalog endpoints.
+
+Entries are keyed on the endpoint, the normalized query string and a
+catalog version stamp. Admin write paths call bump_catalog_version(),
+which moves every worker onto a new key space; stale entries are then
+never read again and age out of the LRU.
+
+The same key doubles as a strong ETag for list endpoints, so a browser
+revalidating an unchanged page gets a 304 without touching Mongo.
+"""
+import hashlib
+import os
+import threading
+import time
+from functools import wraps
+
+from flask import Response, g, request
+
+from models.saree import Counter
+from utils.cache import MemoryBackend
+
+CACHE_ENABLED = os.getenv("CATALOG_CACHE_ENABLED", "true").lower() != "false"
+CACHE_TTL_SECONDS = int(os.getenv("CATALOG_CACHE_TTL_SECONDS", 60))
+CACHE_MAX_ENTRIES = int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", 2048))
+
+# how long a worker trusts its last read of the version stamp
+VERSION_POLL_SECONDS = float(os.getenv("CATALOG_VERSION_POLL_SECONDS", 2))
+
+VERSION_COUNTER = "catalog_version"
+
+_version_lock = threading.Lock()
+_version = {"value": None, "checked_at": 0.0}
+
+
+def _version_fresh(now):
+    return _version["value"] is not None and now - _version["checked_at"] < VERSION_POLL_SECONDS
+
+
+def _store_version(seq, now):
+    with _version_lock:
+        _version["value"] = seq
+        _version["checked_at"] = now
+    return seq
+
+
+def get_catalog_version():
+    now = time.monotonic()
+    if _version_fresh(now):
+        return _version["value"]
+
+    counter = Counter.objects(name=VERSION_COUNTER).only("seq").first()
+    return _store_version(counter.seq if counter else 0, now)
+
+
+async def get_catalog_version_async(counters):
+    """get_catalog_version() for the async catalog; `counters` is the
+    counters collection on an AsyncMongoClient"""
+    now = time.monotonic()
+    if _version_fresh(now):
+        return _version["value"]
+
+    counter = await counters.find_one({"name": VERSION_COUNTER}, {"seq": 1})
+    return _store_version(counter.get("seq", 0) if counter else 0, now)
+
+
+def bump_catalog_version():
+    counter = Counter.objects(name=VERSION_COUNTER).modify(
+        upsert=True,
+        new=True,
+        inc__seq=1
+    )
+    return _store_version(counter.seq, time.monotonic())
+
+
+def normalized_query_key():
+    """Stable representation of request.args: sorted keys, sorted values,
+    comma-separated varieties split, empty values dropped. Signed sessions
+    are per device, so they are left out; make_key adds their scope."""
+    parts = []
+    for key in sorted(request.args):
+        if key == "session":
+            continue
+        values = request.args.getlist(key)
+        if key == "varieties":
+            values = [v.strip() for value in values for v in value.split(",")]
+        values = sorted(v for v in values if v != "")
+        if values:
+            parts.append(f"{key}={','.join(values)}")
+    return "&".join(parts)
+
+
+def content_etag(*parts):
+    return hashlib.sha1(":".join(str(p) for p in parts).encode()).hexdigest()[:32]
+
+
+def not_modified(etag):
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
+
+
+class ResponseCache:
+    def __init__(self, backend, enabled=True):
+        self.backend = backend
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def make_key(self, name):
+        view_args = ",".join(f"{k}={v}" for k, v in sorted((request.view_args or {}).items()))
+        # devices sharing the same categories share entries
+        scope = g.get("client_categories")
+        scope = ",".join(sorted(scope)) if scope is not None else "*"
+        return f"{name}:v{get_catalog_version()}:{scope}:{view_args}:{normalized_query_key()}"
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def cached(self, name, version_etag=False):
+        """Cache successful JSON responses of a GET view.
+
+        version_etag=True derives the ETag from the cache key (i.e. the
+        catalog version); otherwise the view sets its own ETag, which is
+        stored alongside the cached body.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if request.method != "GET":
+                    return view(*args, **kwargs)
+
+                key = self.make_key(name)
+
+                etag = content_etag(key) if version_etag else None
+                if etag and request.if_none_match.contains(etag):
+                    return not_modified(etag)
+
+                if self.enabled:
+                    entry = self.backend.get(key)
+                    if entry is not None:
+                        self._count(True)
+                        body, status, entry_etag = entry
+                        if entry_etag and request.if_none_match.contains(entry_etag):
+                            return not_modified(entry_etag)
+
+                        response = Response(body, status=status, mimetype="application/json")
+                        if entry_etag:
+                            response.set_etag(entry_etag)
+                        return response
+                    self._count(False)
+
+                result = view(*args, **kwargs)
+                response, status = result if isinstance(result, tuple) else (result, result.status_code)
+
+                if status == 200:
+                    if etag:
+                        response.set_etag(etag)
+                    if self.enabled:
+                        self.backend.set(key, (response.get_data(), status, response.get_etag()[0]))
+                return result
+            return wrapper
+        return decorator
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "entries": len(self.backend) if hasattr(self.backend, "__len__") else None,
+            "version": _version["value"]
+        }
+
+
+catalog_cache = ResponseCache(
+    MemoryBackend(maxsize=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS),
+    enabled=CACHE_ENABLED
+)
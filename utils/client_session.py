@@ -0,0 +1,73 @@
+"""
+Stateless signed sessions for the public catalog.
+
+A successful invite verification returns an HMAC-signed session that
+carries the token, the device id and the allowed category ids. /client/*
+requests presenting it are authorized from the signature alone; the only
+per-request check is whether its token has been disabled, one indexed
+find_one per token, remembered for a short TTL.
+"""
+import os
+
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+from models.invite_token import CategoryInviteToken
+from utils.cache import MemoryBackend
+
+SESSION_MAX_AGE_SECONDS = int(os.getenv("CLIENT_SESSION_MAX_AGE_SECONDS", 3600))
+REVOCATION_REFRESH_SECONDS = int(os.getenv("CLIENT_SESSION_REVOCATION_REFRESH_SECONDS", 30))
+REVOCATION_CACHE_SIZE = int(os.getenv("CLIENT_SESSION_REVOCATION_CACHE_SIZE", 4096))
+
+# token -> revoked?, bounded by the tokens actually in use
+_revocations = MemoryBackend(maxsize=REVOCATION_CACHE_SIZE, ttl=REVOCATION_REFRESH_SECONDS)
+
+
+def _serializer(secret=None):
+    # the async catalog has no Flask app context and passes its secret in
+    return URLSafeTimedSerializer(
+        secret or current_app.config["CLIENT_SESSION_SECRET"],
+        salt="client-session"
+    )
+
+
+def issue_session(token, device_id, category_ids):
+    return _serializer().dumps({
+        "t": token,
+        "d": device_id,
+        "c": [str(c) for c in category_ids]
+    })
+
+
+def load_session(value, secret=None):
+    """Payload dict, or None if the signature is bad or expired"""
+    try:
+        return _serializer(secret).loads(value, max_age=SESSION_MAX_AGE_SECONDS)
+    except BadSignature:
+        return None
+
+
+def is_revoked(token):
+    revoked = _revocations.get(token)
+    if revoked is None:
+        # (token, is_active) index
+        revoked = CategoryInviteToken._get_collection().find_one(
+            {"token": token, "is_active": False}, {"_id": 1}
+        ) is not None
+        _revocations.set(token, revoked)
+    return revoked
+
+
+async def is_revoked_async(token, collection):
+    """is_revoked() for the async catalog; `collection` is category_invite_tokens
+    on an AsyncMongoClient"""
+    revoked = _revocations.get(token)
+    if revoked is None:
+        revoked = await collection.find_one({"token": token, "is_active": False}, {"_id": 1}) is not None
+        _revocations.set(token, revoked)
+    return revoked
+
+
+def mark_revoked(token):
+    """Disable endpoints call this so the local worker stops at once"""
+    _revocations.set(token, True)
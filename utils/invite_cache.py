@@ -0,0 +1,39 @@
+"""
+Short-lived cache of invite verification results.
+
+Repeated page loads of an invite link re-verify the same
+(token, device) pair; positive and negative answers are remembered
+for a few seconds. Disabling a token bumps its generation, which makes
+every cached answer for it unreachable in this process; other workers
+catch up within the TTL.
+"""
+import os
+import threading
+
+from utils.cache import MemoryBackend
+
+POSITIVE_TTL_SECONDS = int(os.getenv("INVITE_CACHE_POSITIVE_SECONDS", 30))
+NEGATIVE_TTL_SECONDS = int(os.getenv("INVITE_CACHE_NEGATIVE_SECONDS", 10))
+
+_backend = MemoryBackend(maxsize=4096, ttl=POSITIVE_TTL_SECONDS)
+_generations = {}
+_lock = threading.Lock()
+
+
+def _key(kind, token, *parts):
+    return (kind, token, _generations.get(token, 0)) + parts
+
+
+def get(kind, token, *parts):
+    """(body, status) or None"""
+    return _backend.get(_key(kind, token, *parts))
+
+
+def put(kind, token, *parts, body, status):
+    ttl = POSITIVE_TTL_SECONDS if status == 200 else NEGATIVE_TTL_SECONDS
+    _backend.set(_key(kind, token, *parts), (body, status), ttl=ttl)
+
+
+def invalidate_token(token):
+    with _lock:
+        _generations[token] = _generations.get(token, 0) + 1
@@ -0,0 +1,272 @@
+"""
+Request and Mongo instrumentation, exposed on /admin/metrics.
+
+With METRICS_ENABLED=true, create_app() calls init_metrics(), which
+registers request hooks and a pymongo CommandListener. Requests are
+recorded at teardown, so ones that die with an unhandled exception
+(which skip after_request) still count, as status 500.
+Per route it keeps latency, response size, Mongo commands and Mongo time
+per request, as sliding-window summaries (p50/p95/p99 over the last
+METRICS_WINDOW requests) plus running sums and counts. Commands slower
+than SLOW_QUERY_MS go to a bounded slow-query log with their shape:
+the command with every value replaced by its type.
+
+Disabled (the default), nothing is registered and requests pay nothing.
+Metrics are per worker process; scrape each worker or aggregate upstream.
+"""
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+
+from flask import g, request
+from pymongo import monitoring
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", 1024))
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 100))
+SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", 100))
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# driver bookkeeping, not part of what the query asks for
+_IGNORED_COMMAND_KEYS = {"lsid", "$db", "$clusterTime", "$readPreference", "txnNumber", "apiVersion"}
+
+logger = logging.getLogger(__name__)
+
+
+class Summary:
+    """Running count/sum plus a window of recent samples for quantiles"""
+
+    def __init__(self, window):
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=window)
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.samples.append(value)
+
+    def quantiles(self):
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {q: 0.0 for q in QUANTILES}
+        last = len(ordered) - 1
+        return {q: ordered[min(int(q * len(ordered)), last)] for q in QUANTILES}
+
+
+def command_shape(value, depth=0):
+    """The command with literals replaced by type names, so slow queries
+    group by shape and never log customer data"""
+    if depth > 6:
+        return "..."
+    if isinstance(value, dict):
+        return {
+            k: command_shape(v, depth + 1)
+            for k, v in value.items() if k not in _IGNORED_COMMAND_KEYS
+        }
+    if isinstance(value, (list, tuple)):
+        # one element stands for the rest; pipelines keep every stage
+        if value and all(isinstance(v, dict) for v in value):
+            return [command_shape(v, depth + 1) for v in value]
+        return [command_shape(value[0], depth + 1)] if value else []
+    return type(value).__name__
+
+
+class Registry:
+    def __init__(self, window=METRICS_WINDOW, slow_log_size=SLOW_QUERY_LOG_SIZE):
+        self.window = window
+        self._lock = threading.Lock()
+        self.latency = defaultdict(lambda: Summary(self.window))
+        self.response_size = defaultdict(lambda: Summary(self.window))
+        self.mongo_commands = defaultdict(lambda: Summary(self.window))
+        self.mongo_seconds = defaultdict(lambda: Summary(self.window))
+        self.requests = defaultdict(int)
+        self.commands = defaultdict(lambda: [0, 0.0, 0])  # count, seconds, failures
+        self.slow_queries = deque(maxlen=slow_log_size)
+        self.slow_query_count = 0
+
+    def observe_request(self, route, method, status, seconds, size, commands, mongo_seconds):
+        key = (route, method)
+        with self._lock:
+            self.requests[(route, method, status)] += 1
+            self.latency[key].observe(seconds)
+            if size is not None:
+                self.response_size[key].observe(size)
+            self.mongo_commands[key].observe(commands)
+            self.mongo_seconds[key].observe(mongo_seconds)
+
+    def observe_command(self, name, seconds, failed):
+        with self._lock:
+            stats = self.commands[name]
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] += failed
+
+    def log_slow_query(self, entry):
+        with self._lock:
+            self.slow_query_count += 1
+            self.slow_queries.append(entry)
+
+
+registry = Registry()
+
+# per-thread request state; the command listener runs on the request's thread
+_local = threading.local()
+_listener_registered = False
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    def started(self, event):
+        pending = getattr(_local, "pending", None)
+        if pending is None:
+            pending = _local.pending = {}
+        # keep a reference only; the shape is built if the command turns out slow
+        pending[event.request_id] = event.command
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+    def _finish(self, event, failed):
+        seconds = event.duration_micros / 1e6
+        command = getattr(_local, "pending", {}).pop(event.request_id, None)
+
+        if getattr(_local, "in_request", False):
+            _local.commands += 1
+            _local.mongo_seconds += seconds
+
+        registry.observe_command(event.command_name, seconds, failed)
+
+        if seconds * 1000 >= SLOW_QUERY_MS and command is not None:
+            # find/aggregate/... name the collection as their value, getMore doesn't
+            collection = command.get("collection" if event.command_name == "getMore" else event.command_name)
+            entry = {
+                "command": event.command_name,
+                "collection": collection if isinstance(collection, str) else None,
+                "duration_ms": round(seconds * 1000, 2),
+                "route": getattr(_local, "route", None),
+                "failed": failed,
+                "shape": command_shape(command),
+                "at": time.time(),
+            }
+            registry.log_slow_query(entry)
+            logger.warning("slow mongo command: %s", entry)
+
+
+def _before_request():
+    g.metrics_started = time.perf_counter()
+    _local.in_request = True
+    _local.commands = 0
+    _local.mongo_seconds = 0.0
+    _local.route = request.url_rule.rule if request.url_rule else None
+
+
+def _after_request(response):
+    if "metrics_started" in g:
+        g.metrics_response = (response.status_code, response.calculate_content_length())
+    return response
+
+
+def _teardown_request(exc):
+    started = g.pop("metrics_started", None)
+    if started is None:
+        return
+
+    # no after_request ran: an unhandled exception, answered with a 500
+    status, size = g.pop("metrics_response", (500, None))
+    _local.in_request = False
+    registry.observe_request(
+        route=request.url_rule.rule if request.url_rule else "<unmatched>",
+        method=request.method,
+        status=status,
+        seconds=time.perf_counter() - started,
+        size=size,
+        commands=_local.commands,
+        mongo_seconds=_local.mongo_seconds,
+    )
+
+
+def init_metrics(app):
+    """Call before the Mongo connection is opened: pymongo only attaches
+    listeners registered before a client is created"""
+    global _listener_registered
+    if not METRICS_ENABLED:
+        return
+    # monitoring.register is process-global; create_app() may run more than once
+    if not _listener_registered:
+        monitoring.register(MongoCommandListener())
+        _listener_registered = True
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+
+
+def _labels(**labels):
+    inner = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"'))
+        for k, v in labels.items()
+    )
+    return "{" + inner + "}"
+
+
+def _summary_lines(name, help_text, summaries):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} summary"]
+    for (route, method), summary in sorted(summaries.items()):
+        for q, value in summary.quantiles().items():
+            lines.append(f"{name}{_labels(route=route, method=method, quantile=q)} {value:.6g}")
+        lines.append(f"{name}_sum{_labels(route=route, method=method)} {summary.total:.6g}")
+        lines.append(f"{name}_count{_labels(route=route, method=method)} {summary.count}")
+    return lines
+
+
+def render_prometheus(extra_gauges=None):
+    """Prometheus text exposition format (0.0.4)"""
+    lines = []
+    with registry._lock:
+        lines.append("# HELP http_requests_total Requests by route, method and status")
+        lines.append("# TYPE http_requests_total counter")
+        for (route, method, status), count in sorted(registry.requests.items()):
+            lines.append(f"http_requests_total{_labels(route=route, method=method, status=status)} {count}")
+
+        lines += _summary_lines(
+            "http_request_duration_seconds", "Request latency", registry.latency)
+        lines += _summary_lines(
+            "http_response_size_bytes", "Response body size", registry.response_size)
+        lines += _summary_lines(
+            "mongo_commands_per_request", "Mongo commands issued per request", registry.mongo_commands)
+        lines += _summary_lines(
+            "mongo_seconds_per_request", "Time spent in Mongo per request", registry.mongo_seconds)
+
+        lines.append("# HELP mongo_commands_total Mongo commands by command name")
+        lines.append("# TYPE mongo_commands_total counter")
+        for name, (count, _, _) in sorted(registry.commands.items()):
+            lines.append(f"mongo_commands_total{_labels(command=name)} {count}")
+        lines.append("# HELP mongo_command_seconds_total Mongo time by command name")
+        lines.append("# TYPE mongo_command_seconds_total counter")
+        for name, (_, seconds, _) in sorted(registry.commands.items()):
+            lines.append(f"mongo_command_seconds_total{_labels(command=name)} {seconds:.6g}")
+        lines.append("# HELP mongo_command_failures_total Failed Mongo commands by command name")
+        lines.append("# TYPE mongo_command_failures_total counter")
+        for name, (_, _, failures) in sorted(registry.commands.items()):
+            lines.append(f"mongo_command_failures_total{_labels(command=name)} {failures}")
+
+        lines.append(f"# HELP mongo_slow_queries_total Commands slower than {SLOW_QUERY_MS:g}ms")
+        lines.append("# TYPE mongo_slow_queries_total counter")
+        lines.append(f"mongo_slow_queries_total {registry.slow_query_count}")
+
+    for name, (help_text, value) in (extra_gauges or {}).items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+
+    return "\n".join(lines) + "\n"
+
+
+def slow_queries():
+    with registry._lock:
+        return list(reversed(registry.slow_queries))
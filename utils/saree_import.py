@@ -0,0 +1,192 @@
+"""
+Streaming bulk import for sarees.
+
+Records are read one at a time from an NDJSON or CSV body, validated
+as they arrive and inserted in insert_many batches. Each batch reserves
+its saree numbers with a single counter update and applies its variety
+count deltas in one bulk write. Bad rows are reported, not fatal.
+
+A CSV needs variety, min_price and max_price columns. Names always come
+from the saree counter: saree_id / saree_name only group the rows of one
+saree, so an image listing such as saree_image_urls.csv (saree_id,
+saree_name, image_url and nothing else) is rejected, not imported.
+"""
+import csv
+import io
+import json
+import os
+from collections import Counter as Tally
+
+from mongoengine.errors import ValidationError
+from pymongo.errors import BulkWriteError
+
+from models.saree import Saree, reserve_saree_numbers
+from models.variety import Variety, apply_count_deltas
+
+IMPORT_BATCH_SIZE = int(os.getenv("SAREE_IMPORT_BATCH_SIZE", 500))
+
+# CSV rows sharing one of these keys are one saree with several images
+CSV_GROUP_KEYS = ("saree_id", "saree_name")
+CSV_REQUIRED_COLUMNS = ("variety", "min_price", "max_price")
+
+
+def iter_ndjson_records(stream):
+    """Yields (line_number, record_or_error)"""
+    for line_number, line in enumerate(io.TextIOWrapper(stream, encoding="utf-8-sig"), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_number, ValueError("Invalid JSON")
+            continue
+        if not isinstance(record, dict):
+            yield line_number, ValueError("Each line must be a JSON object")
+            continue
+        yield line_number, record
+
+
+def iter_csv_records(stream):
+    """Yields (line_number, record_or_error); consecutive rows of the same
+    saree (same saree_id / saree_name) are merged"""
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+    fieldnames = reader.fieldnames or []
+
+    missing = [c for c in CSV_REQUIRED_COLUMNS if c not in fieldnames]
+    if missing:
+        yield 1, ValueError(f"CSV header is missing {', '.join(missing)}")
+        return
+
+    group_key = next((k for k in CSV_GROUP_KEYS if k in fieldnames), None)
+
+    current, current_key, current_line = None, None, None
+    for row in reader:
+        row = {k: (v or "").strip() for k, v in row.items() if k}
+        key = row.get(group_key) if group_key else None
+
+        if current is not None and key and key == current_key:
+            current["image_urls"].extend(_row_images(row))
+            continue
+
+        if current is not None:
+            yield current_line, current
+
+        current = {
+            k: v for k, v in row.items()
+            if v and k not in ("image_url", "image_urls") + CSV_GROUP_KEYS
+        }
+        current["image_urls"] = _row_images(row)
+        current_key, current_line = key, reader.line_num
+
+    if current is not None:
+        yield current_line, current
+
+
+def _row_images(row):
+    urls = [row["image_url"]] if row.get("image_url") else []
+    urls += [u.strip() for u in row.get("image_urls", "").split("|") if u.strip()]
+    return urls
+
+
+class SareeImporter:
+    def __init__(self, batch_size=IMPORT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.varieties = set(Variety.objects.scalar("name"))
+        self.inserted = 0
+        self.errors = []
+        self._batch = []
+
+    def run(self, records):
+        for line_number, record in records:
+            saree = self._build(line_number, record)
+            if saree is None:
+                continue
+            self._batch.append((line_number, saree))
+            if len(self._batch) >= self.batch_size:
+                self._flush()
+        self._flush()
+        return self
+
+    def _error(self, line_number, message):
+        self.errors.append({"row": line_number, "error": message})
+
+    def _build(self, line_number, record):
+        if isinstance(record, Exception):
+            self._error(line_number, str(record))
+            return None
+
+        # same rules as POST /saree
+        if not record.get("image_urls") or not record.get("variety"):
+            self._error(line_number, "image_urls and variety are mandatory")
+            return None
+
+        # a bare string is one image, not a list of characters
+        image_urls = record["image_urls"]
+        if isinstance(image_urls, str):
+            image_urls = [image_urls]
+        if not isinstance(image_urls, list) or not all(isinstance(u, str) and u for u in image_urls):
+            self._error(line_number, "image_urls must be a list of strings")
+            return None
+
+        if not isinstance(record["variety"], str):
+            self._error(line_number, "variety must be a string")
+            return None
+
+        if record.get("min_price") in (None, "") or record.get("max_price") in (None, ""):
+            self._error(line_number, "min_price and max_price are mandatory")
+            return None
+
+        if record["variety"] not in self.varieties:
+            self._error(line_number, "Variety not found")
+            return None
+
+        try:
+            saree = Saree(
+                image_urls=image_urls,
+                variety=record["variety"],
+                remarks=record.get("remarks") or None,
+                min_price=float(record["min_price"]),
+                max_price=float(record["max_price"]),
+                status=record.get("status") or "unpublished"
+            )
+            saree.validate()
+        except (ValueError, TypeError, ValidationError) as e:
+            self._error(line_number, str(e))
+            return None
+
+        return saree
+
+    def _flush(self):
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+
+        # ✅ one counter update names the whole batch
+        first = reserve_saree_numbers(len(batch))
+        docs = []
+        for offset, (_, saree) in enumerate(batch):
+            saree.name = f"Saree{first + offset:03d}"
+            saree.prepare_for_write()
+            docs.append(saree.to_mongo().to_dict())
+
+        failed = set()
+        try:
+            Saree._get_collection().insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                failed.add(write_error["index"])
+                self._error(batch[write_error["index"]][0], write_error.get("errmsg", "Insert failed"))
+
+        # ✅ one bulk $inc per batch for the variety counts
+        totals = Tally()
+        published = Tally()
+        for index, (_, saree) in enumerate(batch):
+            if index in failed:
+                continue
+            totals[saree.variety] += 1
+            if saree.status == "published":
+                published[saree.variety] += 1
+
+        apply_count_deltas({name: (totals[name], published[name]) for name in totals})
+        self.inserted += len(batch) - len(failed)
@@ -0,0 +1,49 @@
+"""
+Indexed admin search.
+
+Documents carry a `search_tokens` list holding every lowercase prefix of
+the words in their searchable fields, so a search-box value becomes an
+`$all` match on a multikey index instead of an unanchored regex.
+
+Digit runs index every substring, not only their prefixes, so "12" still
+finds Saree012 as the old substring search did. Names carry short
+numbers, so that stays a handful of extra tokens per document.
+"""
+import re
+
+SEARCH_MODES = ("prefix", "text", "substring")
+MAX_TOKEN_LENGTH = 20
+
+_WORD = re.compile(r"\w+")
+# "saree012" also indexes "saree" and "012" so either half can be searched
+_WORD_PARTS = re.compile(r"[^\W\d_]+|\d+")
+
+
+def search_terms(text):
+    return [word[:MAX_TOKEN_LENGTH] for word in _WORD.findall((text or "").lower())]
+
+
+def search_tokens(*texts):
+    tokens = set()
+    for word in search_terms(" ".join(t for t in texts if t)):
+        for part in {word, *_WORD_PARTS.findall(word)}:
+            starts = range(len(part)) if part.isdigit() else (0,)
+            for start in starts:
+                tokens.update(part[start:i] for i in range(start + 1, len(part) + 1))
+    return sorted(tokens)
+
+
+def search_match(text, mode="prefix", field="name"):
+    """Raw filter for a search-box value.
+
+    prefix    -> every word must prefix a word of the document (indexed)
+    text      -> $text query, needs a text index on the collection
+    substring -> the old case-insensitive regex on `field` (full scan)
+    """
+    if mode == "substring":
+        return {field: {"$regex": re.escape(text), "$options": "i"}}
+    if mode == "text":
+        return {"$text": {"$search": text}}
+
+    terms = search_terms(text)
+    return {"search_tokens": {"$all": terms}} if terms else {}
@@ -0,0 +1,14 @@
+"""
+Production WSGI entry point: gunicorn -c gunicorn.conf.py wsgi:app
+
+gunicorn.conf.py preloads this module in the master and sets
+DEFER_DB_CONNECT=1, so the app is built once and the Mongo connection is
+opened per worker in its post_fork hook. Run without that config (e.g.
+a plain `gunicorn wsgi:app`) and each worker imports this module after
+fork and connects here.
+"""
+import os
+
+from app import create_app
+
+app = create_app(connect=os.getenv("DEFER_DB_CONNECT") != "1")